@@ -0,0 +1,195 @@
+# aggregations.py
+"""
+Agregaciones declarativas: cada pestaña declara sus tablas como claves de agrupación + medidas
+(`Aggregation`) y un plan (`aggregate`) las resuelve juntas sobre el mismo DataFrame.
+
+El plan comparte el trabajo común: las columnas derivadas (victoria, franja horaria, estación...)
+se calculan una sola vez, las agregaciones con las mismas claves se resuelven en una única pasada
+(`bincount` sobre el código de grupo) y las que agrupan por un subconjunto de claves de otra se
+obtienen sumando sus estadísticos suficientes (recuentos y sumas), sin volver a recorrer las filas.
+"""
+import pandas as pd
+import numpy as np
+
+SEASONS = {
+    "December": "Invierno", "January": "Invierno", "February": "Invierno",
+    "March": "Primavera", "April": "Primavera", "May": "Primavera",
+    "June": "Verano", "July": "Verano", "August": "Verano",
+    "September": "Otoño", "October": "Otoño", "November": "Otoño",
+}
+TIME_OF_DAY = ["Mañana", "Mediodía", "Tarde", "Noche"]
+NO_HOUR = "No especificado"
+HOUR_LABELS = np.array([f"{h:02d}:00" for h in range(24)], dtype=object)
+
+
+# --- Medidas: (tipo, columnas) ---
+def count(col="Result"):
+    """Número de valores no nulos de `col`."""
+    return ("count", col)
+
+
+def total(col):
+    """Suma de `col`."""
+    return ("sum", col)
+
+
+def mean(col):
+    """Media de `col` (sin nulos)."""
+    return ("mean", col)
+
+
+def rate(col):
+    """Porcentaje de filas del grupo en que `col` (0/1) vale 1."""
+    return ("rate", col)
+
+
+def ratio(num, den):
+    """Porcentaje `suma(num) / suma(den)`."""
+    return ("ratio", num, den)
+
+
+class Aggregation:
+    """
+    Tabla agregada: `keys` (columnas o dimensiones derivadas), `measures` ({nombre: medida}) y,
+    opcionalmente, `labels` ({clave: {valor: etiqueta}}) para renombrar valores al presentar.
+    """
+
+    def __init__(self, keys, measures, labels=None):
+        self.keys = tuple(keys)
+        self.measures = dict(measures)
+        self.labels = labels or {}
+
+
+# --- Columnas derivadas (se calculan una vez por plan) ---
+def _hour(plan):
+    hours = plan.df["Hour"]
+    return pd.to_datetime(hours.astype(str), format="%H:%M:%S", errors="coerce").dt.hour.to_numpy()
+
+
+def _time_of_day(plan):
+    h = plan.column("_hour")
+    labels = np.select([(h >= 5) & (h <= 11), (h >= 12) & (h <= 16), (h >= 17) & (h <= 20), ~np.isnan(h)],
+                       TIME_OF_DAY, NO_HOUR)
+    return labels.astype(object)
+
+
+def _hour_category(plan):
+    h = plan.column("_hour")
+    labels = np.full(len(h), "N/A", dtype=object)
+    known = ~np.isnan(h)
+    labels[known] = HOUR_LABELS[h[known].astype(int)]
+    return labels
+
+
+DERIVED = {
+    "Win": lambda plan: (plan.df["Result"] == "W").to_numpy(dtype=float),
+    "Decided": lambda plan: (plan.df["Result"] != "N").to_numpy(dtype=float),
+    "_hour": _hour,
+    "TimeOfDay": _time_of_day,
+    "Hour_Category": _hour_category,
+    "Season": lambda plan: plan.df["Month"].map(SEASONS).fillna("Desconocido").to_numpy(dtype=object),
+}
+INTEGER_COLUMNS = {"Win", "Decided"}
+
+
+class AggregationPlan:
+    """Resuelve un conjunto de `Aggregation` sobre un DataFrame compartiendo el trabajo común."""
+
+    def __init__(self, df):
+        self.df = df
+        self._columns = {}
+        self.passes = 0     # Pasadas completas sobre las filas (una por conjunto de claves no derivable)
+
+    def column(self, name):
+        """Columna del DataFrame o derivada (calculada una sola vez)."""
+        if name not in self._columns:
+            self._columns[name] = self.df[name].to_numpy() if name in self.df.columns else DERIVED[name](self)
+        return self._columns[name]
+
+    def _complete(self, key):
+        return bool(pd.notna(self.column(key)).all())
+
+    def _scan(self, keys, sums, counts):
+        """Estadísticos suficientes por grupo de `keys` en una pasada (`bincount` sobre el código de grupo)."""
+        self.passes += 1
+        grouped = pd.DataFrame({k: self.column(k) for k in keys}).groupby(list(keys), sort=True, dropna=True)
+        # Las filas con alguna clave nula quedan fuera (ngroup da NaN): código -1, como `dropna=True`
+        codes = grouped.ngroup().fillna(-1).to_numpy(np.int64)
+        size = grouped.size()
+        valid = codes >= 0
+        stats = {"__n": size.to_numpy()}
+        for col in sums:
+            values = self.column(col).astype(float)
+            ok = valid & ~np.isnan(values)
+            stats[f"sum:{col}"] = np.bincount(codes[ok], weights=values[ok], minlength=len(size))
+        for col in counts:
+            ok = valid & pd.notna(self.column(col))
+            stats[f"count:{col}"] = np.bincount(codes[ok], minlength=len(size))
+        return pd.DataFrame(stats, index=size.index)
+
+    def run(self, specs):
+        """`{nombre: DataFrame}` con las claves como índice, igual que `groupby(keys).agg(...)`."""
+        sums, counts = set(), set()
+        for spec in specs.values():
+            for measure in spec.measures.values():
+                kind, cols = measure[0], measure[1:]
+                if kind == "count":
+                    counts.add(cols[0])
+                else:
+                    sums.update(cols)
+                    if kind == "mean":
+                        counts.add(cols[0])
+
+        # Un conjunto de estadísticos por conjunto de claves distinto; de más a menos claves para poder agregar hacia arriba
+        stats = {}
+        for keys in sorted({spec.keys for spec in specs.values()}, key=len, reverse=True):
+            parents = [k for k in stats if set(keys) < set(k) and all(self._complete(x) for x in set(k) - set(keys))]
+            if parents:
+                parent = min(parents, key=lambda k: len(stats[k]))
+                stats[keys] = stats[parent].groupby(level=list(keys), sort=True).sum()
+            else:
+                stats[keys] = self._scan(keys, sorted(sums), sorted(counts))
+
+        return {name: self._measures(stats[spec.keys], spec) for name, spec in specs.items()}
+
+    @staticmethod
+    def _measures(stats, spec):
+        result = pd.DataFrame(index=stats.index)
+        n = stats["__n"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for name, (kind, *cols) in spec.measures.items():
+                if kind == "count":
+                    result[name] = stats[f"count:{cols[0]}"].astype(int)
+                elif kind == "sum":
+                    values = stats[f"sum:{cols[0]}"]
+                    result[name] = values.astype(int) if cols[0] in INTEGER_COLUMNS else values
+                elif kind == "mean":
+                    result[name] = stats[f"sum:{cols[0]}"] / stats[f"count:{cols[0]}"].replace(0, np.nan)
+                elif kind == "rate":
+                    result[name] = stats[f"sum:{cols[0]}"] / n * 100
+                elif kind == "ratio":
+                    result[name] = stats[f"sum:{cols[0]}"] / stats[f"sum:{cols[1]}"].replace(0, np.nan) * 100
+        if spec.labels:
+            result = result.reset_index()
+            for key, labels in spec.labels.items():
+                result[key] = result[key].map(lambda v: labels.get(v, v))
+            result = result.set_index(list(spec.keys)).sort_index()
+        return result
+
+
+def aggregate(df, specs):
+    """Resuelve las agregaciones `specs` ({nombre: Aggregation}) sobre `df` en un único plan."""
+    return AggregationPlan(df).run(specs)
+
+
+def performance_spec(group_col):
+    """Agregación base de las tablas de rendimiento (`utils.create_performance_df`)."""
+    return Aggregation([group_col], {
+        "Total_Partidos": count(),
+        "Victorias": total("Win"),
+        "Merit_Avg": mean("Merit"),
+        "Quimica_Avg": mean("Quimica"),
+        "Rendiment_Avg": mean("Rendiment"),
+        "GameDiff_Avg": mean("Game-Diff"),
+        "Win_Rate_Sin_Empates": ratio("Win", "Decided"),
+    })
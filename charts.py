@@ -0,0 +1,133 @@
+# charts.py
+import hashlib
+import json
+import re
+import threading
+import weakref
+from collections import OrderedDict
+
+import streamlit as st
+import pandas as pd
+
+try:
+    # Módulo interno de Streamlit (probado con 1.4x-1.5x): si cambia, los datasets se pasan como DataFrame
+    from streamlit import dataframe_util
+except ImportError:
+    dataframe_util = None
+
+MAX_CACHED_SPECS = 256  # Specs serializadas (plantilla + datos en Arrow) que se mantienen en memoria
+
+_templates = {}              # (chart_id, esquema de columnas) -> (spec validada sin datos, columnas que usa)
+_specs = OrderedDict()       # (chart_id, huella de datos) -> spec lista para st.vega_lite_chart (LRU)
+_fingerprints = {}           # id(DataFrame) -> (weakref, {columnas: huella}) de los DataFrames vivos
+_lock = threading.Lock()
+
+
+def data_fingerprint(data):
+    """Huella del contenido de un DataFrame (valores, índice y columnas)."""
+    h = hashlib.sha1(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    h.update(repr(list(data.columns)).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def _schema(data):
+    return tuple((str(c), str(t)) for c, t in data.dtypes.items())
+
+
+def _build_template(data, builder):
+    """
+    Construye la plantilla Vega-Lite de un gráfico con un DataFrame vacío del mismo esquema.
+    Altair valida el JSON-schema una única vez; el resultado no contiene datos.
+    Devuelve `(plantilla, columnas que menciona)`, o `(None, None)` si el gráfico no se puede
+    separar de sus datos (varios datasets).
+    """
+    spec = builder(data.iloc[:0]).to_dict()
+    datasets = spec.pop("datasets", {})
+    top_data = spec.pop("data", None)
+    if len(datasets) != 1 or top_data != {"name": next(iter(datasets))}:
+        return None, None
+    text = json.dumps(spec)
+    if next(iter(datasets)) in text:
+        return None, None
+    # Columnas mencionadas en la spec (campos, tooltips, expresiones `datum.X`): el resto no se serializa
+    columns = tuple(c for c in data.columns if re.search(rf"(?<![\w-]){re.escape(str(c))}(?![\w-])", text))
+    return spec, columns
+
+
+def _data_key(data, columns):
+    """
+    Huella de las columnas `columns` de `data`. Se recuerda por identidad del DataFrame mientras
+    siga vivo: los DataFrames de la vista cacheada se reutilizan entre re-ejecuciones y no se
+    vuelven a recorrer (no deben modificarse después de pintarlos).
+    """
+    with _lock:
+        entry = _fingerprints.get(id(data))
+        if entry is not None and entry[0]() is data and columns in entry[1]:
+            return entry[1][columns]
+    fingerprint = data_fingerprint(data[list(columns)])
+    with _lock:
+        entry = _fingerprints.get(id(data))
+        if entry is None or entry[0]() is not data:
+            ref = weakref.ref(data, lambda _, key=id(data): _fingerprints.pop(key, None))
+            entry = _fingerprints[id(data)] = (ref, {})
+        entry[1][columns] = fingerprint
+    return fingerprint
+
+
+def render_chart(chart_id, data, builder, use_container_width=True):
+    """
+    Pinta un gráfico de Altair reutilizando su spec serializada.
+
+    `builder(data)` debe devolver el gráfico de Altair y sólo se llama la primera vez que aparece
+    `chart_id` (o si cambian las columnas). Las plantillas no deben depender de los valores de los
+    datos, sólo de sus columnas. Sólo se serializan las columnas que usa el gráfico, y si los datos
+    son el mismo DataFrame que en la re-ejecución anterior (p. ej. de la vista cacheada), pintar el
+    gráfico cuesta una búsqueda en el diccionario.
+    """
+    template_key = (chart_id, _schema(data))
+    if template_key not in _templates:
+        _templates[template_key] = _build_template(data, builder)
+    template, columns = _templates[template_key]
+    if template is None:
+        st.altair_chart(builder(data), use_container_width=use_container_width)
+        return
+
+    fingerprint = _data_key(data, columns)
+    key = (chart_id, fingerprint)
+    with _lock:
+        spec = _specs.get(key)
+        if spec is not None:
+            _specs.move_to_end(key)
+
+    if spec is None:
+        projected = data[list(columns)]
+        # Los datasets ya en bytes de Arrow se pasan tal cual al proto del gráfico
+        dataset = dataframe_util.convert_anything_to_arrow_bytes(projected) if dataframe_util is not None else projected
+        spec = dict(template, data={"name": fingerprint}, datasets={fingerprint: dataset})
+        with _lock:
+            _specs[key] = spec
+            while len(_specs) > MAX_CACHED_SPECS:
+                _specs.popitem(last=False)
+
+    st.vega_lite_chart(spec=spec, use_container_width=use_container_width)
+
+
+def cache_bytes():
+    """Bytes de los datasets (Arrow) de las specs cacheadas."""
+    with _lock:
+        return sum(len(d) if isinstance(d, bytes) else int(d.memory_usage(deep=True).sum())
+                   for spec in _specs.values() for d in spec["datasets"].values())
+
+
+def clear_cache():
+    """Vacía las specs cacheadas (las plantillas, sin datos, se conservan)."""
+    with _lock:
+        _specs.clear()
+
+
+def reset():
+    """Vacía specs, plantillas y huellas: el siguiente gráfico se construye como en un proceso nuevo."""
+    with _lock:
+        _specs.clear()
+        _templates.clear()
+        _fingerprints.clear()
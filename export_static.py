@@ -0,0 +1,340 @@
+# export_static.py
+"""
+Exporta el dashboard a un sitio estático (sin Python en el servidor).
+
+Ejecuta `streamlit_app.py` en modo headless (AppTest) para la vista por defecto y para cada
+preset de filtros, y guarda especificaciones Vega-Lite y tablas precalculadas. Los datos de
+gráficos y tablas se deduplican por contenido entre vistas, y al regenerar sólo se vuelven a
+renderizar las vistas cuya huella ha cambiado: código, filtros y las filas que dejan pasar esos
+filtros (más las opciones del planificador), no el snapshot global. Un partido nuevo de 2025 no
+regenera la vista de la temporada 2024; el planificador de una vista que no se regenera conserva
+el modelo con el que se renderizó.
+
+Los datos son los mismos que lee el dashboard: las fuentes de `PADEL_SOURCES` o el almacén de
+`PADEL_STORE` (ver sources.py y storage.py).
+
+Uso:
+    python export_static.py --out site --presets presets.json
+
+Formato de presets.json:
+    [{"name": "Temporada 2024", "filters": {"year_filter": [2024]}},
+     {"name": "Sólo victorias", "filters": {"result_filter": ["W"], "date_range": ["2024-01-01", "2024-06-30"]}}]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+APP_DIR = Path(__file__).resolve().parent
+APP_FILE = APP_DIR / "streamlit_app.py"
+DEFAULT_VIEW = {"name": "Vista por defecto", "filters": {}}
+# Clave del widget en los presets -> argumento de los filtros (ver utils.filter_mask)
+WIDGET_FILTERS = {
+    "year_filter": "year", "month_filter": "month", "weekday_filter": "weekday",
+    "location_filter": "location", "teammate_filter": "teammate", "result_filter": "result",
+    "opponent_filter": "opponent", "source_filter": "source", "date_range": "date_range",
+}
+PLANNER_OPTIONS = ["Teammate", "Location", "Opponent", "Frecuentes"]
+
+INDEX_HTML = """<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>Dashboard Padel Avanzado</title>
+<script src="https://cdn.jsdelivr.net/npm/vega@5"></script>
+<script src="https://cdn.jsdelivr.net/npm/vega-lite@5"></script>
+<script src="https://cdn.jsdelivr.net/npm/vega-embed@6"></script>
+<style>
+body {font-family: sans-serif; background-color: #f5f5f5; margin: 2em;}
+section {background-color: #ffffff; padding: 10px; border-radius: 5px; margin-bottom: 1em;}
+.metric {display: inline-block; border: 1px solid #e6e6e6; border-radius: 5px; padding: 10px; margin: 4px;}
+.chart {width: 100%;}
+table {border-collapse: collapse; font-size: 0.85em;}
+td, th {border: 1px solid #e6e6e6; padding: 2px 6px;}
+.table {max-height: 400px; overflow: auto;}
+</style>
+</head>
+<body>
+<h1>🎾 Dashboard Padel Avanzado</h1>
+<select id="view"></select>
+<div id="content"></div>
+<script>
+const fetchJson = (url) => fetch(url).then((r) => r.json());
+
+// Los valores de las hojas y los textos van siempre como texto (textContent), nunca como HTML
+function append(parent, tag, text) {
+  const el = document.createElement(tag);
+  if (text !== undefined) el.textContent = text ?? "";
+  parent.appendChild(el);
+  return el;
+}
+
+function renderTable(el, rows) {
+  if (!rows.length) return;
+  const cols = Object.keys(rows[0]);
+  const table = append(el, "table");
+  const head = append(table, "tr");
+  for (const c of cols) append(head, "th", c);
+  for (const r of rows) {
+    const tr = append(table, "tr");
+    for (const c of cols) append(tr, "td", r[c] === null || r[c] === undefined ? "" : String(r[c]));
+  }
+}
+
+async function renderView(file) {
+  const view = await fetchJson(file);
+  const content = document.getElementById("content");
+  content.replaceChildren();
+  for (const tab of view.tabs) {
+    const section = append(content, "section");
+    append(section, "h2", tab.title);
+    for (const item of tab.elements) {
+      const el = append(section, "div");
+      if (item.type === "text") append(el, "p", item.body);
+      if (item.type === "metric") { el.className = "metric"; append(el, "div", item.label); append(el, "b", String(item.value)); }
+      if (item.type === "chart") { el.className = "chart"; vegaEmbed(el, item.spec, {actions: false}); }
+      if (item.type === "table") { el.className = "table"; fetchJson(item.data).then((rows) => renderTable(el, rows)); }
+    }
+  }
+}
+
+fetchJson("manifest.json").then((manifest) => {
+  const select = document.getElementById("view");
+  for (const view of manifest.views) select.add(new Option(view.name, view.file));
+  select.onchange = () => renderView(select.value);
+  renderView(select.value);
+});
+</script>
+</body>
+</html>
+"""
+
+
+def _hash(*parts):
+    h = hashlib.sha1()
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def load_history():
+    """
+    Historial completo, opciones de los filtros y snapshot de los datos que va a renderizar el
+    dashboard (misma configuración de entorno).
+    """
+    if os.environ.get("PADEL_STORE"):
+        from storage import PartitionedStore
+        store = PartitionedStore(os.environ["PADEL_STORE"])
+        return store.load(store.options["Year"], store.options["Date"]), store.options, store.snapshot
+    from utils import build_filter_options, load_data
+    df, snapshot = load_data()
+    if snapshot is None:
+        raise RuntimeError("No se pudieron cargar los datos de las fuentes configuradas")
+    return df, build_filter_options(df), snapshot
+
+
+def view_fingerprint(df, options, filters):
+    """
+    Huella de los datos de una vista: las filas que dejan pasar sus filtros (claves de widget, como
+    en los presets; lo que no se indica queda en su valor por defecto) y las opciones del planificador.
+    """
+    from utils import apply_filters
+    from views import default_filters, normalize_filters
+
+    values = default_filters(options)
+    values.update({WIDGET_FILTERS[key]: value for key, value in filters.items()})
+    filtered = apply_filters(df, normalize_filters(values))
+    rows = pd.util.hash_pandas_object(filtered, index=False).to_numpy()
+    planner = {key: options.get(key) for key in PLANNER_OPTIONS}
+    return _hash(rows.tobytes(), json.dumps(planner, sort_keys=True, default=str))
+
+
+def code_fingerprint():
+    """Huella del código del dashboard: si cambia, todas las vistas se regeneran."""
+    files = [APP_FILE, APP_DIR / "utils.py"] + sorted((APP_DIR / "tabs").glob("*.py"))
+    files += sorted(p for p in APP_DIR.glob("*.py") if p.name not in ("streamlit_app.py", "utils.py"))
+    return _hash(*[p.read_bytes() for p in files])
+
+
+def slugify(name):
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "vista"
+
+
+def _arrow_to_frame(arrow_bytes):
+    return pa.ipc.open_stream(arrow_bytes).read_all().to_pandas()
+
+
+def _frame_records(df):
+    """Convierte un DataFrame en registros JSON (fechas en ISO)."""
+    if not isinstance(df.index, pd.RangeIndex):
+        df = df.reset_index()
+    return json.loads(df.to_json(orient="records", date_format="iso", default_handler=str, force_ascii=False))
+
+
+class DataStore:
+    """Guarda los datos de gráficos y tablas una sola vez por contenido."""
+
+    def __init__(self, out_dir):
+        self.dir = out_dir / "data"
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.referenced = set()
+
+    def put(self, records):
+        payload = json.dumps(records, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+        name = f"{_hash(payload)}.json"
+        path = self.dir / name
+        if not path.exists():
+            path.write_text(payload, encoding="utf-8")
+        self.referenced.add(name)
+        return f"data/{name}"
+
+    def collect_garbage(self):
+        for path in self.dir.glob("*.json"):
+            if path.name not in self.referenced:
+                path.unlink()
+
+
+def _referenced_data(view):
+    """Ficheros de datos usados por una vista ya exportada."""
+    refs = set()
+    for tab in view["tabs"]:
+        for item in tab["elements"]:
+            if item["type"] == "table":
+                refs.add(os.path.basename(item["data"]))
+            if item["type"] == "chart":
+                refs.update(re.findall(r'data/([0-9a-f]+\.json)', json.dumps(item["spec"])))
+    return refs
+
+
+def _chart_spec(proto, store):
+    """Spec Vega-Lite con los datasets en línea sustituidos por URLs deduplicadas."""
+    spec = json.loads(proto.spec)
+    urls = {ds.name: store.put(_frame_records(_arrow_to_frame(ds.data.data))) for ds in proto.datasets}
+    if proto.HasField("data") and proto.data.data:
+        spec["data"] = {"url": store.put(_frame_records(_arrow_to_frame(proto.data.data)))}
+
+    def replace(node):
+        if isinstance(node, dict):
+            if set(node) == {"name"} and node["name"] in urls:
+                return {"url": urls[node["name"]]}
+            return {k: replace(v) for k, v in node.items()}
+        if isinstance(node, list):
+            return [replace(v) for v in node]
+        return node
+
+    spec = replace(spec)
+    if proto.use_container_width:
+        spec.setdefault("width", "container")
+    return spec
+
+
+def _apply_filters(at, filters):
+    for key, value in filters.items():
+        if key == "date_range":
+            at.date_input[0].set_value([pd.to_datetime(v).date() for v in value])
+        else:
+            at.multiselect(key=key).set_value(value)
+
+
+def _walk(node, tab_title, tabs, in_tab=False):
+    """Recorre el árbol de elementos agrupándolos por pestaña (la cabecera va en 'Resumen')."""
+    node_type = getattr(node, "type", None)
+    if node_type == "tab":
+        # Pestañas anidadas (p.ej. dentro de Dataframes) llevan el nombre de la pestaña padre
+        tab_title = f"{tab_title} · {node.label}" if in_tab else node.label
+        in_tab = True
+    if node_type in ("sidebar", "expander"):
+        return
+    if node_type not in (None, "tab", "tab_container"):
+        tabs.setdefault(tab_title, []).append(node)
+    for child in getattr(node, "children", {}).values():
+        _walk(child, tab_title, tabs, in_tab)
+
+
+def render_view(filters, store, timeout=120):
+    """Renderiza el dashboard con unos filtros y devuelve sus pestañas serializadas."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(APP_FILE), default_timeout=timeout)
+    at.run()
+    if filters:
+        _apply_filters(at, filters)
+        at.run()
+    if at.exception:
+        raise RuntimeError(f"Error al renderizar la vista: {at.exception[0].value}")
+
+    grouped = {}
+    _walk(at.main, "Resumen", grouped)
+    tabs = []
+    for title, nodes in grouped.items():
+        elements = []
+        for node in nodes:
+            if node.type in ("markdown", "subheader", "title", "header", "success", "info", "warning"):
+                elements.append({"type": "text", "body": node.value})
+            elif node.type == "metric":
+                elements.append({"type": "metric", "label": node.label, "value": node.value})
+            elif node.type == "vega_lite_chart":
+                elements.append({"type": "chart", "spec": _chart_spec(node.proto, store)})
+            elif node.type == "dataframe":
+                elements.append({"type": "table", "data": store.put(_frame_records(node.value))})
+        if elements:
+            tabs.append({"title": title, "elements": elements})
+    return tabs
+
+
+def export_site(out_dir, presets=()):
+    """Genera (o actualiza de forma incremental) el sitio estático en `out_dir`."""
+    out_dir = Path(out_dir)
+    (out_dir / "views").mkdir(parents=True, exist_ok=True)
+
+    manifest_path = out_dir / "manifest.json"
+    previous = json.loads(manifest_path.read_text(encoding="utf-8")) if manifest_path.exists() else {"views": []}
+    previous_keys = {v["file"]: v["key"] for v in previous["views"]}
+
+    history, options, snapshot = load_history()
+    code = code_fingerprint()
+    store = DataStore(out_dir)
+    views, rendered = [], 0
+    for preset in [DEFAULT_VIEW, *presets]:
+        filters = preset.get("filters", {})
+        key = _hash(code, json.dumps(filters, sort_keys=True, default=str), view_fingerprint(history, options, filters))
+        file = f"views/{slugify(preset['name'])}.json"
+        path = out_dir / file
+        if previous_keys.get(file) == key and path.exists():
+            store.referenced.update(_referenced_data(json.loads(path.read_text(encoding="utf-8"))))
+        else:
+            view = {"name": preset["name"], "filters": filters, "tabs": render_view(filters, store)}
+            path.write_text(json.dumps(view, ensure_ascii=False, default=str), encoding="utf-8")
+            rendered += 1
+        views.append({"name": preset["name"], "file": file, "key": key})
+
+    for path in (out_dir / "views").glob("*.json"):
+        if f"views/{path.name}" not in {v["file"] for v in views}:
+            path.unlink()
+    store.collect_garbage()
+
+    (out_dir / "index.html").write_text(INDEX_HTML, encoding="utf-8")
+    manifest = {"snapshot": snapshot, "generated": datetime.now().isoformat(timespec="seconds"), "views": views}
+    manifest_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    return rendered, len(views)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta el dashboard a un sitio estático.")
+    parser.add_argument("--out", default="site", help="Directorio de salida")
+    parser.add_argument("--presets", help="Fichero JSON con los presets de filtros")
+    args = parser.parse_args()
+
+    presets = json.loads(Path(args.presets).read_text(encoding="utf-8")) if args.presets else []
+    rendered, total = export_site(args.out, presets)
+    print(f"Vistas renderizadas: {rendered}/{total} -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# insights.py
+"""
+Búsqueda de segmentos destacados: combinaciones de 2 y 3 dimensiones (compañero, lugar, rival,
+franja horaria, día) cuyo % de victorias o Merit medio se aleja de forma significativa de la media.
+El % de victorias se contrasta con un test binomial exacto y el Merit medio con un test z; como se
+evalúan miles de segmentos, los significativos se eligen con Benjamini-Hochberg sobre todos los
+contrastes hechos (tasa de falsos descubrimientos `fdr`).
+
+Las dimensiones se codifican una vez como enteros y cada combinación se resuelve con `bincount`
+sobre códigos mixtos. Los segmentos con menos de `min_support` partidos se podan antes de pasar a
+combinaciones mayores (un segmento nunca tiene más partidos que sus sub-segmentos), y la búsqueda
+se corta al agotar el presupuesto de tiempo.
+"""
+import math
+import time
+from itertools import combinations
+
+import pandas as pd
+import numpy as np
+
+DIMENSIONS = {
+    "Teammate": "Compañero",
+    "Location": "Lugar",
+    "Opponent": "Rival",
+    "Franja": "Franja",
+    "Weekday": "Día",
+}
+HOUR_BUCKETS = ["Mañana", "Mediodía", "Tarde", "Noche"]
+MAX_DENSE_CELLS = 2_000_000  # Por encima, los códigos mixtos se compactan con np.unique
+
+
+def hour_buckets(hours):
+    """Franja horaria de cada partido (mismos cortes que la pestaña de estadísticas); -1 si no hay hora."""
+    h = pd.to_datetime(hours.astype(str), format="%H:%M:%S", errors="coerce").dt.hour
+    codes = np.select([h.between(5, 11), h.between(12, 16), h.between(17, 20), h.notna()], [0, 1, 2, 3], -1)
+    return codes.astype(np.int64)
+
+
+def encode(df):
+    """Códigos enteros (-1 = sin valor) y etiquetas de cada dimensión disponible."""
+    codes, labels = {}, {}
+    for dim in DIMENSIONS:
+        if dim == "Franja":
+            if "Hour" in df.columns:
+                codes[dim], labels[dim] = hour_buckets(df["Hour"]), np.array(HOUR_BUCKETS, dtype=object)
+        elif dim in df.columns:
+            code, values = pd.factorize(df[dim])
+            if len(values):  # Una columna sin ningún valor no forma segmentos
+                codes[dim], labels[dim] = code.astype(np.int64), values
+    return codes, labels
+
+
+def binomial_pvalues(k, n, p0, log_fact):
+    """
+    p-valor exacto bilateral de `k` victorias en `n` partidos frente a una probabilidad `p0`: suma de
+    los resultados igual o menos probables (como `scipy.stats.binomtest`). `log_fact[i]` = log(i!).
+    Se evalúan a la vez todos los segmentos, con un tramo de `n + 1` probabilidades por segmento.
+    """
+    k, n = np.asarray(k, dtype=np.int64), np.asarray(n, dtype=np.int64)
+    if not 0 < p0 < 1:  # Sin variación posible, todos los segmentos coinciden con la media
+        return np.ones(len(n))
+    starts = np.cumsum(n + 1) - (n + 1)
+    seg = np.repeat(np.arange(len(n)), n + 1)
+    j = np.arange(len(seg)) - starts[seg]
+    m = n[seg]
+    log_pmf = log_fact[m] - log_fact[j] - log_fact[m - j] + j * np.log(p0) + (m - j) * np.log1p(-p0)
+    observed = log_pmf[starts + k]
+    tail = np.where(log_pmf <= observed[seg] + 1e-7, np.exp(log_pmf), 0.0)
+    return np.minimum(np.bincount(seg, weights=tail, minlength=len(n)), 1.0)
+
+
+def benjamini_hochberg(pvalues, n_tests, fdr):
+    """
+    Umbral de p-valor de Benjamini-Hochberg para `n_tests` contrastes, de los que basta con pasar los
+    p-valores <= `fdr` (el resto nunca se rechaza). Devuelve 0 si no se rechaza ninguno.
+    """
+    p = np.sort(np.asarray(pvalues, dtype=float))
+    below = np.flatnonzero(p <= fdr * np.arange(1, len(p) + 1) / max(n_tests, 1))
+    return p[below[-1]] if len(below) else 0.0
+
+
+def _segment_stats(code, rows, cells, win, merit):
+    """Partidos, victorias y sumas de Merit por segmento (sólo filas `rows`)."""
+    code = code[rows]
+    if cells > MAX_DENSE_CELLS:
+        segments, code = np.unique(code, return_inverse=True)
+        cells = len(segments)
+    else:
+        segments = None
+    n = np.bincount(code, minlength=cells)
+    w = np.bincount(code, weights=win[rows], minlength=cells)
+    s = np.bincount(code, weights=merit[rows], minlength=cells)
+    return segments, n, w, s
+
+
+def mine_insights(df, min_support=5, max_order=3, fdr=0.05, budget_s=0.5, top_k=15):
+    """
+    Segmentos de 2 y 3 dimensiones con desviación significativa del % de victorias o del Merit medio
+    respecto a la media de `df`, con una tasa de falsos descubrimientos `fdr` sobre todos los
+    contrastes. Devuelve `{"insights", "baseline", "complete", "evaluated"}`.
+    """
+    start = time.perf_counter()
+    codes, labels = encode(df)
+    win = (df["Result"] == "W").to_numpy(dtype=float)
+    merit = df["Merit"].to_numpy(dtype=float)
+    valid_merit = ~np.isnan(merit)
+    merit = np.where(valid_merit, merit, 0.0)
+
+    n_total = len(df)
+    p0 = win.mean() if n_total else np.nan
+    mu0 = merit[valid_merit].mean() if valid_merit.any() else np.nan
+    sd0 = merit[valid_merit].std(ddof=1) if valid_merit.sum() > 1 else np.nan
+    baseline = {"Partidos": n_total, "WinRate": p0 * 100, "Merit": mu0}
+    log_fact = np.concatenate(([0.0], np.cumsum(np.log(np.arange(1, n_total + 1)))))
+    normal_pvalue = np.vectorize(lambda z: math.erfc(abs(z) / math.sqrt(2)), otypes=[float])
+
+    # Valores frecuentes de cada dimensión (poda de nivel 1)
+    frequent = {}
+    for dim, code in codes.items():
+        counts = np.bincount(code[code >= 0], minlength=len(labels[dim]))
+        frequent[(dim,)] = (code, counts >= min_support, len(labels[dim]))
+
+    # Candidatos con algún p-valor <= fdr; el umbral de Benjamini-Hochberg se fija al final, con todos los contrastes
+    found, evaluated, tests, complete = [], 0, 0, True
+    for order in range(2, max_order + 1):
+        if not complete:  # Sin tiempo para completar el orden anterior faltan sus sub-segmentos
+            break
+        for dims in combinations(codes, order):
+            if time.perf_counter() - start > budget_s:
+                complete = False
+                break
+            # Filas cuyos sub-segmentos de orden inferior son todos frecuentes
+            rows = np.ones(n_total, dtype=bool)
+            for sub in combinations(dims, order - 1):
+                if sub not in frequent:  # Sub-segmento sin filas frecuentes: la combinación tampoco las tiene
+                    rows[:] = False
+                    break
+                code, ok, _ = frequent[sub]
+                rows &= (code >= 0) & ok[np.maximum(code, 0)]
+            if not rows.any():
+                continue
+
+            # Código mixto de la combinación
+            cells, code = 1, np.zeros(n_total, dtype=np.int64)
+            for dim in dims:
+                code = code * len(labels[dim]) + np.maximum(codes[dim], 0)
+                cells *= len(labels[dim])
+            segments, n, w, s = _segment_stats(code, rows, cells, win, merit)
+            evaluated += int((n > 0).sum())
+
+            ok = n >= min_support
+            if order < max_order:
+                dense_ok = np.zeros(cells, dtype=bool)
+                dense_ok[segments[ok] if segments is not None else np.flatnonzero(ok)] = True
+                frequent[dims] = (np.where(rows, code, -1), dense_ok, cells)
+
+            idx = np.flatnonzero(ok)
+            if len(idx) == 0:
+                continue
+            with np.errstate(divide="ignore", invalid="ignore"):
+                p = w[idx] / n[idx]
+                z_win = (p - p0) / np.sqrt(p0 * (1 - p0) / n[idx])
+                mean = s[idx] / n[idx]
+                z_merit = (mean - mu0) / (sd0 / np.sqrt(n[idx]))
+            z_win, z_merit = np.nan_to_num(z_win), np.nan_to_num(z_merit)
+            p_win = binomial_pvalues(np.round(w[idx]), n[idx], p0, log_fact)
+            p_merit = normal_pvalue(z_merit) if len(idx) else np.ones(0)
+            tests += 2 * len(idx)
+            hits = np.flatnonzero(np.minimum(p_win, p_merit) <= fdr)
+
+            for i in hits:
+                cell = segments[idx[i]] if segments is not None else idx[i]
+                parts = []
+                for dim in reversed(dims):
+                    cell, value = divmod(cell, len(labels[dim]))
+                    parts.append(f"{DIMENSIONS[dim]}: {labels[dim][value]}")
+                found.append({
+                    "Segmento": " · ".join(reversed(parts)),
+                    "Dimensiones": order,
+                    "Partidos": int(n[idx[i]]),
+                    "WinRate": p[i] * 100,
+                    "Merit_Avg": mean[i],
+                    "Δ_WinRate": (p[i] - p0) * 100,
+                    "Δ_Merit": mean[i] - mu0,
+                    "z_WinRate": z_win[i],
+                    "z_Merit": z_merit[i],
+                    "p_WinRate": p_win[i],
+                    "p_Merit": p_merit[i],
+                })
+        if not complete:
+            break
+
+    insights = pd.DataFrame(found, columns=["Segmento", "Dimensiones", "Partidos", "WinRate", "Merit_Avg",
+                                            "Δ_WinRate", "Δ_Merit", "z_WinRate", "z_Merit", "p_WinRate", "p_Merit"])
+    threshold = benjamini_hochberg(insights[["p_WinRate", "p_Merit"]].to_numpy().ravel(), tests, fdr)
+    insights = insights.assign(p_valor=insights[["p_WinRate", "p_Merit"]].min(axis=1))
+    insights = insights[insights["p_valor"] <= threshold].drop(columns=["p_WinRate", "p_Merit"])
+    if not insights.empty:
+        insights = insights.nsmallest(top_k, "p_valor").round({c: 2 for c in insights.columns if c != "p_valor"})
+    insights = insights.reset_index(drop=True)
+    return {"insights": insights, "baseline": baseline, "complete": complete, "evaluated": evaluated}
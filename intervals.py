@@ -0,0 +1,111 @@
+# intervals.py
+import time
+
+import pandas as pd
+import numpy as np
+
+DEFAULT_SEED = 42            # Semilla fija: mismos datos -> mismos intervalos (cacheable)
+DEFAULT_RESAMPLES = 2000     # Número máximo de remuestreos por grupo
+MIN_RESAMPLES = 200          # Número mínimo de remuestreos, aunque haya muchas filas
+MAX_ROW_DRAWS = 20_000_000   # Remuestreos x filas por cálculo: fija el número de remuestreos según el tamaño
+BATCH_CELLS = 1_000_000      # Remuestreos x filas por lote: acota la memoria de cada lote (~24 MB)
+DEFAULT_BUDGET_S = 5.0       # Corte de seguridad por tiempo (si salta, se indica en el resultado)
+
+CI_COLUMNS = ['Win_Rate_IC_Inf', 'Win_Rate_IC_Sup', 'Merit_IC_Inf', 'Merit_IC_Sup']
+
+
+def _win_rate_draws(wins, decisive, n_draws, rng, method):
+    """Devuelve una matriz (n_draws, grupos) con % de victorias remuestreados."""
+    decisive_safe = np.maximum(decisive, 1)
+    if method == "bayes":
+        # Posterior Beta(1 + V, 1 + D) partiendo de un prior uniforme
+        draws = rng.beta(1 + wins, 1 + decisive - wins, size=(n_draws, len(wins)))
+    else:
+        # Remuestrear con reemplazo los n partidos decididos de un grupo equivale a una binomial(n, V/n)
+        draws = rng.binomial(decisive, wins / decisive_safe, size=(n_draws, len(wins))) / decisive_safe
+    return draws * 100
+
+
+def _mean_draws(values, starts, counts, n_draws, rng):
+    """Remuestrea la media de cada grupo; las filas vienen ordenadas por grupo."""
+    group_of_row = np.repeat(np.arange(len(counts)), counts)
+    u = rng.random((n_draws, len(values)))
+    idx = starts[group_of_row] + (u * counts[group_of_row]).astype(np.int64)
+    sums = np.add.reduceat(values[idx], starts, axis=1)
+    return sums / counts
+
+
+def resample_count(n_rows, n_resamples=DEFAULT_RESAMPLES):
+    """Número de remuestreos para `n_rows` filas: depende sólo del tamaño de los datos, no del tiempo."""
+    return int(np.clip(MAX_ROW_DRAWS // max(n_rows, 1), MIN_RESAMPLES, n_resamples))
+
+
+def _bootstrap(wins, decisive, values, counts, n_resamples, seed, method, alpha, budget_s):
+    """
+    Calcula los intervalos de todos los grupos por lotes de como mucho `BATCH_CELLS` remuestreos x filas.
+    Cada medida usa su propio generador, así que el resultado no depende del tamaño de los lotes.
+    Devuelve `(ic_victorias, ic_merit, remuestreos hechos)`.
+    """
+    win_rng, merit_rng = (np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(2))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    batch = max(1, BATCH_CELLS // max(len(values), len(counts), 1))
+    deadline = time.perf_counter() + budget_s
+
+    win_batches, merit_batches = [], []
+    done = 0
+    while done < n_resamples:
+        n = min(batch, n_resamples - done)
+        win_batches.append(_win_rate_draws(wins, decisive, n, win_rng, method))
+        merit_batches.append(_mean_draws(values, starts, counts, n, merit_rng))
+        done += n
+        if time.perf_counter() > deadline:
+            break
+
+    q = [alpha / 2, 1 - alpha / 2]
+    win_ci = np.quantile(np.vstack(win_batches), q, axis=0)
+    merit_ci = np.quantile(np.vstack(merit_batches), q, axis=0)
+    # Sin partidos decididos no hay información sobre el % de victorias
+    win_ci[:, decisive == 0] = 0
+    return win_ci, merit_ci, done
+
+
+def bootstrap_intervals(df, group_col, value_col="Merit", n_resamples=DEFAULT_RESAMPLES, alpha=0.05,
+                        method="bootstrap", seed=DEFAULT_SEED, budget_s=DEFAULT_BUDGET_S):
+    """
+    Intervalos de confianza del % de victorias (sin empates) y del Merit medio para cada grupo.
+    Los remuestreos de todos los grupos se generan a la vez como arrays de NumPy, por lotes.
+    `method` puede ser "bootstrap" o "bayes" (posterior Beta). El número de remuestreos sale del
+    tamaño de los datos (`resample_count`); `attrs` indica cuántos se han hecho y si ha saltado
+    el corte de seguridad por tiempo.
+    """
+    if df.empty or group_col not in df.columns:
+        return pd.DataFrame(columns=CI_COLUMNS)
+
+    codes, uniques = pd.factorize(df[group_col], sort=True)
+    if len(uniques) == 0:  # Columna sin ningún valor: no hay grupos
+        return pd.DataFrame(columns=CI_COLUMNS, index=pd.Index(uniques, name=group_col))
+    valid = codes >= 0
+    codes = codes[valid]
+    order = np.argsort(codes, kind="stable")
+    codes = codes[order]
+    result = df['Result'].to_numpy()[valid][order]
+    values = df[value_col].to_numpy(dtype=float)[valid][order]
+
+    n_groups = len(uniques)
+    counts = np.bincount(codes, minlength=n_groups)
+    wins = np.bincount(codes, weights=(result == 'W'), minlength=n_groups).astype(np.int64)
+    decisive = np.bincount(codes, weights=(result != 'N'), minlength=n_groups).astype(np.int64)
+
+    planned = resample_count(len(values), n_resamples)
+    win_ci, merit_ci, done = _bootstrap(wins, decisive, values, counts, planned, seed, method, alpha, budget_s)
+
+    intervals = pd.DataFrame({
+        'Win_Rate_IC_Inf': win_ci[0],
+        'Win_Rate_IC_Sup': win_ci[1],
+        'Merit_IC_Inf': merit_ci[0],
+        'Merit_IC_Sup': merit_ci[1],
+    }, index=pd.Index(uniques, name=group_col))
+    intervals[['Win_Rate_IC_Inf', 'Win_Rate_IC_Sup']] = intervals[['Win_Rate_IC_Inf', 'Win_Rate_IC_Sup']].round(1)
+    intervals[['Merit_IC_Inf', 'Merit_IC_Sup']] = intervals[['Merit_IC_Inf', 'Merit_IC_Sup']].round(2)
+    intervals.attrs = {"IC_Remuestreos": done, "IC_Corte": done < planned}
+    return intervals
@@ -0,0 +1,374 @@
+# loadtest.py
+"""
+Prueba de carga del dashboard con sesiones simultáneas.
+
+Genera un historial sintético de partidos con el formato de la hoja, apunta `load_data` a él con
+`PADEL_SOURCES` y ejecuta `streamlit_app.py` en modo headless (AppTest) con N sesiones en hilos a
+la vez, en el mismo proceso (igual que un servidor: comparten cachés, modelo y memoria). Cada
+sesión hace una secuencia aleatoria de interacciones: cambios de filtros y vistas rápidas en la
+barra lateral y acciones dentro de las pestañas (paginar y ordenar la tabla, buscar, planificador).
+
+AppTest no está pensado para ejecuciones simultáneas en un proceso: cada `run()` sustituye el
+`Runtime._instance` global por un runtime simulado y parchea `config.get_option` mientras dura.
+Con varias sesiones a la vez, una ejecución puede usar el runtime simulado de otra (todos son
+equivalentes: cachés y ficheros en memoria, sin servidor) y los parches de configuración se anidan
+entre hilos, así que al terminar cada ronda se restaura `config.get_option`. Las latencias son
+las de la aplicación compartiendo proceso, no las de un servidor real con su runtime.
+
+Para cada combinación de tamaño de datos y número de sesiones se mide la latencia de cada
+re-ejecución (p50/p95/p99), el rendimiento (re-ejecuciones por segundo), el pico de RSS del
+proceso y la memoria de la caché de vistas. Los resultados se añaden a un CSV con una etiqueta
+(por defecto el commit actual) para comparar versiones.
+
+Uso:
+    python loadtest.py --rows 1000 10000 --sessions 1 4 8 --steps 10 --out loadtest.csv
+    python loadtest.py --rows 5000 --sessions 4 --max-p95-ms 1500     # código de salida 1 si se supera
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import numpy as np
+
+APP_DIR = Path(__file__).resolve().parent
+APP_FILE = APP_DIR / "streamlit_app.py"
+
+LOCATIONS = ["Club A", "Club B", "Club C", "Polideportivo", "Indoor X", "Pista Municipal"]
+N_TEAMMATES = 15
+N_OPPONENTS = 30
+START_DATE = pd.Timestamp("2021-01-01")
+MATCHES_PER_DAY = 2         # Densidad del historial: más filas = más años
+SAMPLE_S = 0.05             # Intervalo de muestreo del RSS
+
+
+# --- Datos sintéticos ---
+def _zipf(rng, names, n):
+    """Valores con frecuencias decrecientes (unos pocos compañeros o lugares concentran los partidos)."""
+    weights = 1 / np.arange(1, len(names) + 1)
+    return rng.choice(names, n, p=weights / weights.sum())
+
+
+def synthetic_matches(rows, seed=0):
+    """Historial sintético de `rows` partidos con el formato del CSV de la hoja (coma decimal, dd/mm/aaaa)."""
+    rng = np.random.default_rng(seed)
+    days = max(rows // MATCHES_PER_DAY, 30)
+    dates = START_DATE + pd.to_timedelta(rng.integers(0, days, rows), unit="D")
+    hours = rng.integers(8, 23, rows)
+    result = rng.choice(["W", "L", "N"], rows, p=[0.5, 0.4, 0.1])
+    merit = rng.normal(0, 1, rows) + np.where(result == "W", 0.5, -0.5)
+    return pd.DataFrame({
+        "Date": dates.strftime("%d/%m/%Y"),
+        "Hour": [f"{h:02d}:{m:02d}" for h, m in zip(hours, rng.choice([0, 30], rows))],
+        "Location": _zipf(rng, LOCATIONS, rows),
+        "Teammate": _zipf(rng, [f"Jugador {i}" for i in range(N_TEAMMATES)], rows),
+        "Opponent": _zipf(rng, [f"Rival {i}" for i in range(N_OPPONENTS)], rows),
+        "Result": result,
+        "Merit": [f"{x:.2f}".replace(".", ",") for x in merit],
+        "Game-Diff": np.clip(np.round(merit * 3), -6, 6).astype(int),
+        "Quimica": rng.integers(1, 11, rows),
+        "Rendiment": rng.integers(1, 11, rows),
+    })
+
+
+def write_dataset(rows, directory, seed=0):
+    """Escribe el CSV sintético y su JSON de fuentes; devuelve `(ruta del JSON, DataFrame)`."""
+    df = synthetic_matches(rows, seed)
+    csv_path = Path(directory) / f"partidos_{rows}.csv"
+    df.to_csv(csv_path, index=False)
+    sources_path = Path(directory) / f"sources_{rows}.json"
+    sources_path.write_text(json.dumps([{"name": "Sintético", "url": str(csv_path)}]), encoding="utf-8")
+    return sources_path, df
+
+
+# --- Interacciones de una sesión ---
+# Cada acción modifica un widget de la AppTest y devuelve False si no es aplicable en el estado
+# actual (p. ej. acciones de pestañas cuando los filtros no dejan partidos).
+def _subset(rng, values, low=1, high=3):
+    k = int(rng.integers(low, min(high, len(values)) + 1))
+    return list(rng.choice(values, k, replace=False))
+
+
+def _filter_years(at, rng, data):
+    at.multiselect(key="year_filter").set_value([int(y) for y in _subset(rng, data["years"], 1, len(data["years"]))])
+
+
+def _filter_locations(at, rng, data):
+    at.multiselect(key="location_filter").set_value(_subset(rng, data["locations"]))
+
+
+def _filter_teammates(at, rng, data):
+    at.multiselect(key="teammate_filter").set_value(_subset(rng, data["teammates"], 2, 6))
+
+
+def _filter_result(at, rng, data):
+    at.multiselect(key="result_filter").set_value(_subset(rng, ["W", "L", "N"], 1, 3))
+
+
+def _date_range(at, rng, data):
+    start, end = data["dates"]
+    a, b = sorted(rng.integers(0, (end - start).days + 1, 2))
+    at.date_input(key="date_filter").set_value((start + pd.Timedelta(days=int(a)), start + pd.Timedelta(days=int(b))))
+
+
+def _preset(at, rng, data):
+    options = [o for o in at.selectbox(key="preset_choice").options if o != "—"]
+    at.selectbox(key="preset_choice").set_value(str(rng.choice(options)))
+
+
+def _reset(at, rng, data):
+    at.button(key=f"all_{rng.choice(['year_filter', 'location_filter', 'teammate_filter', 'result_filter'])}").click()
+
+
+def _page(at, rng, data):
+    page = at.number_input(key="datos_table_page")
+    pages = int(re.search(r"de (\d+)", page.label).group(1))
+    if pages < 2:
+        return False
+    page.set_value(int(rng.integers(1, pages + 1)))
+
+
+def _sort(at, rng, data):
+    at.selectbox(key="datos_table_sort").set_value(str(rng.choice(at.selectbox(key="datos_table_sort").options)))
+    at.radio(key="datos_table_order").set_value(str(rng.choice(["Desc.", "Asc."])))
+
+
+def _search(at, rng, data):
+    at.text_input[0].set_value(str(rng.choice(data["locations"] + data["teammates"])).split()[-1])
+
+
+def _planner(at, rng, data):
+    at.multiselect(key="plan_teammates").set_value(_subset(rng, data["teammates"], 2, 8))
+    at.multiselect(key="plan_locations").set_value(_subset(rng, data["locations"], 1, 3))
+
+
+# Nombre -> (función, peso relativo en la secuencia)
+ACTIONS = {
+    "Año": (_filter_years, 3),
+    "Lugar": (_filter_locations, 3),
+    "Compañero": (_filter_teammates, 2),
+    "Resultado": (_filter_result, 2),
+    "Fechas": (_date_range, 2),
+    "Vista rápida": (_preset, 3),
+    "Todo": (_reset, 2),
+    "Datos: página": (_page, 2),
+    "Datos: orden": (_sort, 1),
+    "Datos: búsqueda": (_search, 1),
+    "Planificador": (_planner, 1),
+}
+
+
+def _dataset_options(df):
+    dates = pd.to_datetime(df["Date"], dayfirst=True)
+    return {
+        "years": sorted(dates.dt.year.unique().tolist()),
+        "locations": sorted(df["Location"].unique().tolist()),
+        "teammates": sorted(df["Teammate"].unique().tolist()),
+        "dates": (dates.min().date(), dates.max().date()),
+    }
+
+
+def run_session(session, steps, data, seed, timeout, think_s, start_barrier, records):
+    """Una sesión: carga inicial y `steps` interacciones aleatorias, cronometrando cada re-ejecución."""
+    from streamlit.testing.v1 import AppTest
+
+    rng = np.random.default_rng(seed)
+    names = list(ACTIONS)
+    weights = np.array([ACTIONS[n][1] for n in names], dtype=float)
+    at = AppTest.from_file(str(APP_FILE), default_timeout=timeout)
+    start_barrier.wait()
+
+    def timed(action):
+        start = time.perf_counter()
+        at.run()
+        records.append({"Sesión": session, "Acción": action, "Latencia_ms": (time.perf_counter() - start) * 1000,
+                        "Errores": len(at.exception), "Excepción": at.exception[0].value if at.exception else None,
+                        "Fin": time.perf_counter()})
+
+    timed("Inicio")
+    for _ in range(steps):
+        for _attempt in range(5):
+            action = str(rng.choice(names, p=weights / weights.sum()))
+            try:
+                applicable = ACTIONS[action][0](at, rng, data) is not False
+            except (KeyError, IndexError):  # El widget no está en la página actual
+                applicable = False
+            if applicable:
+                break
+        else:
+            action = "Todo"
+            _reset(at, rng, data)
+        if think_s:
+            time.sleep(rng.exponential(think_s))
+        timed(action)
+
+
+# --- Medición ---
+def rss_bytes():
+    """Memoria residente del proceso (Linux: /proc; en otros sistemas, el pico de `getrusage`)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class RssSampler:
+    """Pico de RSS durante un bloque `with`, muestreado en un hilo."""
+
+    def __init__(self, interval=SAMPLE_S):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_bytes())
+
+    def __enter__(self):
+        self.peak = rss_bytes()
+        self._thread = threading.Thread(target=self._loop, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_bytes())
+
+
+def reset_caches():
+    """Estado del proceso vacío entre rondas, para que cada combinación empiece en frío y sea comparable."""
+    import streamlit as st
+    import charts
+    import pagination
+    import views
+    from memory import memory_manager
+    from prediction import win_model
+    from sources import federated_loader
+
+    st.cache_data.clear()
+    federated_loader.reset()
+    memory_manager.clear()
+    charts.reset()
+    pagination.clear_cache()
+    views.clear_prewarmed()
+    views.clear_partitioned_moments()
+    views.preset_registry.clear()
+    win_model.reset()
+
+
+def run_round(rows, sessions, steps, data, seed, timeout, think_s):
+    """Una ronda: `sessions` sesiones simultáneas; devuelve `(resumen, registros por re-ejecución)`."""
+    from streamlit import config
+    from memory import MB, memory_manager
+
+    reset_caches()
+    get_option = config.get_option  # Los parches de AppTest entre hilos pueden no deshacerse en orden
+    records = []
+    barrier = threading.Barrier(sessions + 1)
+    threads = [threading.Thread(target=run_session, name=f"session-{i}",
+                                args=(i, steps, data, seed * 1000 + i, timeout, think_s, barrier, records))
+               for i in range(sessions)]
+    with RssSampler() as rss:
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        wall_s = time.perf_counter() - start
+    config.get_option = get_option
+
+    raw = pd.DataFrame(records)
+    raw.insert(0, "Filas", rows)
+    raw.insert(1, "Sesiones", sessions)
+    raw["Fin"] -= start
+    interactions = raw.loc[raw["Acción"] != "Inicio", "Latencia_ms"]
+    metrics = memory_manager.metrics()
+    summary = {
+        "Filas": rows,
+        "Sesiones": sessions,
+        "Reruns": len(raw),
+        "Errores": int(raw["Errores"].sum()),
+        "Inicio_p50_ms": raw.loc[raw["Acción"] == "Inicio", "Latencia_ms"].median(),
+        "p50_ms": interactions.quantile(0.50),
+        "p95_ms": interactions.quantile(0.95),
+        "p99_ms": interactions.quantile(0.99),
+        "Reruns_por_s": len(raw) / wall_s,
+        "Tiempo_s": wall_s,
+        "RSS_pico_MB": rss.peak / MB,
+        "Vistas_MB": metrics["view_cache_bytes"] / MB,
+        "Aciertos_caché": metrics["view_cache_hits_total"] / max(metrics["view_cache_hits_total"] + metrics["view_cache_misses_total"], 1),
+        "Degradado": bool(metrics["degraded"]),
+    }
+    return summary, raw
+
+
+def default_label():
+    """Etiqueta de la versión medida: el commit actual, si es un repositorio git."""
+    proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR, capture_output=True, text=True)
+    return proc.stdout.strip() if proc.returncode == 0 else ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del dashboard con sesiones simultáneas (AppTest).")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000], help="Tamaños del historial sintético")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8], help="Sesiones simultáneas")
+    parser.add_argument("--steps", type=int, default=10, help="Interacciones por sesión (tras la carga inicial)")
+    parser.add_argument("--think", type=float, default=0.0, help="Pausa media entre interacciones (s); 0 = sin pausa")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120, help="Tiempo máximo por re-ejecución (s)")
+    parser.add_argument("--label", default=None, help="Etiqueta de la versión (por defecto, el commit actual)")
+    parser.add_argument("--out", default="loadtest.csv", help="CSV de resúmenes (se añaden filas)")
+    parser.add_argument("--raw", default=None, help="CSV opcional con la latencia de cada re-ejecución")
+    parser.add_argument("--max-p95-ms", type=float, default=None, help="Falla (código 1) si algún p95 lo supera")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(APP_DIR))
+    os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")  # Sin avisos de Streamlit entre los resultados
+    os.environ.pop("PADEL_STORE", None)  # Siempre desde el CSV sintético, no desde el almacén particionado
+    label = args.label if args.label is not None else default_label()
+    summaries, raws = [], []
+    with tempfile.TemporaryDirectory(prefix="padel-loadtest-") as tmp:
+        for rows in args.rows:
+            sources_path, df = write_dataset(rows, tmp, args.seed)
+            os.environ["PADEL_SOURCES"] = str(sources_path)
+            data = _dataset_options(df)
+            for sessions in args.sessions:
+                summary, raw = run_round(rows, sessions, args.steps, data, args.seed, args.timeout, args.think)
+                summaries.append({"Etiqueta": label, "Fecha": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M"), **summary})
+                raws.append(raw)
+                print(f"{rows} filas · {sessions} sesiones: p50 {summary['p50_ms']:.0f} ms · p95 {summary['p95_ms']:.0f} ms · "
+                      f"p99 {summary['p99_ms']:.0f} ms · {summary['Reruns_por_s']:.1f} reruns/s · "
+                      f"RSS {summary['RSS_pico_MB']:.0f} MB · errores {summary['Errores']}", flush=True)
+
+    results = pd.DataFrame(summaries).round(3)
+    out = Path(args.out)
+    results.to_csv(out, mode="a", header=not out.exists(), index=False)
+    if args.raw:
+        pd.concat(raws, ignore_index=True).round(3).to_csv(args.raw, index=False)
+
+    print()
+    print(results.drop(columns=["Etiqueta", "Fecha"]).to_string(index=False))
+    by_action = pd.concat(raws).groupby("Acción")["Latencia_ms"].describe(percentiles=[0.5, 0.95])
+    print()
+    print(by_action[["count", "50%", "95%", "max"]].round(0).to_string())
+
+    failed = results["Errores"].sum() > 0
+    if args.max_p95_ms is not None and (results["p95_ms"] > args.max_p95_ms).any():
+        print(f"p95 por encima de {args.max_p95_ms:.0f} ms", file=sys.stderr)
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+# memory.py
+"""
+Contabilidad de memoria por sesión y por entrada de caché, con límites y desalojo.
+
+Las vistas preparadas (ver views.py) se guardan en una caché propia en la que cada entrada conoce
+su tamaño (bytes de sus DataFrames y arrays) y las sesiones que la usan. Con límites por sesión y
+global (`PADEL_SESSION_MEMORY_MB`, `PADEL_MEMORY_MB`), al superarlos se desalojan primero las
+vistas de las sesiones menos activas recientemente. Cerca del límite global la aplicación entra en
+modo degradado: vacía las cachés secundarias y deja de pre-calentar presets, en lugar de crecer
+hasta que el contenedor la mate por falta de memoria.
+
+Con `PADEL_TRACEMALLOC_SAMPLE=N` se mide con tracemalloc el pico de memoria de 1 de cada N
+re-ejecuciones (aproximado: con sesiones simultáneas se suman sus asignaciones). Con
+`PADEL_METRICS_PORT` las métricas se sirven en formato Prometheus en `http://host:puerto/metrics`.
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import numpy as np
+
+MB = 1024 * 1024
+SESSION_CAP_MB = float(os.environ.get("PADEL_SESSION_MEMORY_MB", 256))
+GLOBAL_CAP_MB = float(os.environ.get("PADEL_MEMORY_MB", 1024))
+DEGRADED_FRACTION = 0.9      # Fracción del límite global a partir de la que se degrada
+SESSION_IDLE_S = 30 * 60     # Sesiones sin actividad durante más tiempo se olvidan
+TRACEMALLOC_SAMPLE = int(os.environ.get("PADEL_TRACEMALLOC_SAMPLE", 0))  # 0 = desactivado
+PREWARM_OWNER = "prewarm"
+
+
+def nbytes(obj, _seen=None):
+    """Tamaño aproximado en bytes de un objeto: DataFrames/Series (deep), arrays y contenedores."""
+    seen = _seen if _seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True, index=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(nbytes(k, seen) + nbytes(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(nbytes(v, seen) for v in obj)
+    if hasattr(obj, "__dict__") and not isinstance(obj, type):
+        return sys.getsizeof(obj) + nbytes(vars(obj), seen)
+    return sys.getsizeof(obj)
+
+
+def session_id():
+    """Identificador de la sesión de Streamlit actual (None fuera de una ejecución)."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+    except ImportError:
+        return None
+    return ctx.session_id if ctx is not None else None
+
+
+class MemoryManager:
+    """Caché de vistas con contabilidad de memoria por entrada y por sesión."""
+
+    def __init__(self, session_cap_mb=SESSION_CAP_MB, global_cap_mb=GLOBAL_CAP_MB):
+        self.session_cap = session_cap_mb * MB
+        self.global_cap = global_cap_mb * MB
+        self._entries = OrderedDict()   # clave -> {"value", "bytes", "owners", "last"} (LRU)
+        self._sessions = {}             # id -> {"last", "reruns", "state_bytes", "traced_peak"}
+        self._caches = {}               # nombre -> (tamaño(), vaciar()) de cachés secundarias
+        self._lock = threading.RLock()
+        self._tracing = 0
+        self._reruns = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = Counter()      # motivo -> entradas desalojadas
+        self.degraded_clears = 0        # Veces que se han vaciado las cachés secundarias
+        self._in_degraded = False       # Si ya se está en modo degradado (las cachés sólo se vacían al entrar)
+
+    # --- Cachés secundarias ---
+    def register_cache(self, name, size, clear):
+        """Registra una caché secundaria: `size()` en bytes (o None si no se conoce) y `clear()`."""
+        self._caches[name] = (size, clear)
+
+    # --- Sesiones ---
+    def begin_rerun(self, sid, session_state=None):
+        """Marca actividad de la sesión y, si toca, empieza a medir con tracemalloc."""
+        now = time.time()
+        with self._lock:
+            self._reruns += 1
+            session = self._sessions.setdefault(sid, {"last": now, "reruns": 0, "state_bytes": 0, "traced_peak": None})
+            session["last"] = now
+            session["reruns"] += 1
+            session["state_bytes"] = nbytes(dict(session_state)) if session_state is not None else 0
+            session["sampling"] = bool(TRACEMALLOC_SAMPLE) and self._reruns % TRACEMALLOC_SAMPLE == 0
+            if session["sampling"]:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start(1)
+                tracemalloc.reset_peak()
+                self._tracing += 1
+                session["traced_start"] = tracemalloc.get_traced_memory()[0]
+
+    def end_rerun(self, sid):
+        """Cierra la medición de la re-ejecución (idempotente)."""
+        with self._lock:
+            session = self._sessions.get(sid)
+            if not session or not session.pop("sampling", False):
+                return
+            session["traced_peak"] = tracemalloc.get_traced_memory()[1] - session.pop("traced_start", 0)
+            self._tracing -= 1
+            if self._tracing == 0:
+                tracemalloc.stop()
+
+    # --- Caché de vistas ---
+    def get_or_compute(self, key, owner, compute):
+        """Valor de `key`; si no está, lo calcula con `compute()` y aplica los límites."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry["owners"].add(owner)
+                entry["last"] = time.time()
+                self.hits += 1
+                return entry["value"]
+        value = compute()
+        with self._lock:
+            self.misses += 1
+            if key not in self._entries:
+                self._entries[key] = {"value": value, "bytes": nbytes(value), "owners": {owner}, "last": time.time()}
+            self._enforce(keep=key)
+            return self._entries[key]["value"] if key in self._entries else value
+
+    def _owner_last(self, owner):
+        return self._sessions.get(owner, {}).get("last", 0.0)
+
+    def _release(self, key, owner, reason):
+        entry = self._entries[key]
+        entry["owners"].discard(owner)
+        if not entry["owners"]:
+            del self._entries[key]
+            self.evictions[reason] += 1
+
+    def _enforce(self, keep):
+        now = time.time()
+        for sid in [s for s, info in self._sessions.items() if now - info["last"] > SESSION_IDLE_S]:
+            del self._sessions[sid]
+            for key in [k for k, e in self._entries.items() if sid in e["owners"]]:
+                self._release(key, sid, "sesión inactiva")
+
+        # Límite por sesión: cada sesión conserva sus vistas más recientes
+        for owner, used in self._usage_by_owner().items():
+            for key in [k for k, e in self._entries.items() if owner in e["owners"] and k != keep]:
+                if used <= self.session_cap:
+                    break
+                used -= self._entries[key]["bytes"]
+                self._release(key, owner, "límite de sesión")
+
+        # Al entrar en modo degradado se vacían una vez las cachés secundarias (sus resultados están en las vistas)
+        degraded = self.degraded()
+        if degraded and not self._in_degraded:
+            for name, (_, clear) in self._caches.items():
+                clear()
+            self.degraded_clears += 1
+        self._in_degraded = degraded
+
+        # Límite global: primero las vistas cuyas sesiones llevan más tiempo sin actividad
+        while self.total_bytes() + self._secondary_bytes() > self.global_cap:
+            candidates = [k for k in self._entries if k != keep]
+            if not candidates:
+                break
+            victim = min(candidates, key=lambda k: (max(self._owner_last(o) for o in self._entries[k]["owners"]),
+                                                    self._entries[k]["last"]))
+            del self._entries[victim]
+            self.evictions["límite global"] += 1
+
+    def clear(self):
+        """Vacía la caché de vistas, las sesiones y los contadores (p. ej. entre rondas de `loadtest.py`)."""
+        with self._lock:
+            self._entries.clear()
+            self._sessions.clear()
+            self.hits = self.misses = self.degraded_clears = 0
+            self._in_degraded = False
+            self.evictions.clear()
+
+    # --- Consultas ---
+    def _usage_by_owner(self):
+        usage = Counter()
+        for entry in self._entries.values():
+            for owner in entry["owners"]:
+                usage[owner] += entry["bytes"]
+        return usage
+
+    def total_bytes(self):
+        """Bytes de las vistas cacheadas."""
+        return sum(e["bytes"] for e in self._entries.values())
+
+    def _secondary_bytes(self):
+        return sum(size() or 0 for size, _ in self._caches.values())
+
+    def degraded(self):
+        """Cerca del límite global: no se pre-calienta y se vacían las cachés secundarias."""
+        return self.total_bytes() + self._secondary_bytes() > DEGRADED_FRACTION * self.global_cap
+
+    def sessions(self):
+        """Tabla por sesión: actividad, re-ejecuciones, vistas y memoria atribuida."""
+        with self._lock:
+            usage = self._usage_by_owner()
+            views = Counter(o for e in self._entries.values() for o in e["owners"])
+            now = time.time()
+            rows = [{
+                "Sesión": str(sid)[:8], "Inactiva_s": round(now - info["last"], 1), "Reruns": info["reruns"],
+                "Vistas": views[sid], "Vistas_MB": usage[sid] / MB, "Estado_KB": info["state_bytes"] / 1024,
+                "Pico_tracemalloc_MB": info["traced_peak"] / MB if info["traced_peak"] is not None else np.nan,
+            } for sid, info in self._sessions.items()]
+        return pd.DataFrame(rows).round(2)
+
+    def metrics(self):
+        """Métricas agregadas (también las que se exponen en formato Prometheus)."""
+        with self._lock:
+            caches = {name: size() for name, (size, _) in self._caches.items()}
+            return {
+                "view_cache_bytes": self.total_bytes(),
+                "view_cache_entries": len(self._entries),
+                "view_cache_hits_total": self.hits,
+                "view_cache_misses_total": self.misses,
+                "sessions_active": len(self._sessions),
+                "session_state_bytes": sum(s["state_bytes"] for s in self._sessions.values()),
+                "memory_cap_bytes": self.global_cap,
+                "session_cap_bytes": self.session_cap,
+                "degraded": int(self.degraded()),
+                "evictions": dict(self.evictions),
+                "degraded_clears_total": self.degraded_clears,
+                "secondary_cache_bytes": {k: v for k, v in caches.items() if v is not None},
+                "traced_peak_bytes": {str(sid): s["traced_peak"] for sid, s in self._sessions.items()
+                                      if s["traced_peak"] is not None},
+            }
+
+    def prometheus(self):
+        """Métricas en formato de texto de Prometheus."""
+        m = self.metrics()
+        lines = []
+        for name in ["view_cache_bytes", "view_cache_entries", "view_cache_hits_total", "view_cache_misses_total",
+                     "sessions_active", "session_state_bytes", "memory_cap_bytes", "session_cap_bytes", "degraded",
+                     "degraded_clears_total"]:
+            lines.append(f"padel_{name} {m[name]}")
+        for reason, n in m["evictions"].items():
+            lines.append(f'padel_view_cache_evictions_total{{reason="{reason}"}} {n}')
+        for cache, size in m["secondary_cache_bytes"].items():
+            lines.append(f'padel_secondary_cache_bytes{{cache="{cache}"}} {size}')
+        for sid, peak in m["traced_peak_bytes"].items():
+            lines.append(f'padel_session_traced_peak_bytes{{session="{sid[:8]}"}} {peak}')
+        return "\n".join(lines) + "\n"
+
+
+memory_manager = MemoryManager()
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port):
+    """Sirve `/metrics` (Prometheus) en un hilo en segundo plano; sólo la primera llamada lo arranca."""
+    global _server
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = memory_manager.prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("0.0.0.0", int(port)), Handler)
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    return _server
@@ -0,0 +1,233 @@
+# moments.py
+import pandas as pd
+import numpy as np
+
+METRIC_COLS = ["Merit", "Quimica", "Rendiment", "Game-Diff"]
+MIN_ROWS_PER_PARTITION = 4  # Con menos filas por partición, fusionar estados no ahorra nada frente a las filas
+# Claves gruesas, de pocos valores: el rango de fechas se resuelve con sumas acumuladas y el resto de
+# filtros (día, lugar, compañero, rival) sólo puede resolverse así si dejan pasar todas las filas
+PARTITION_KEYS = ["Year", "Month", "Result", "Source"]
+RESIDUAL_COLS = ["Weekday", "Location", "Teammate", "Opponent"]
+
+
+class Moments:
+    """
+    Estado de momentos (n, medias y co-momentos centrados) de varias columnas numéricas.
+    Se actualiza fila a fila (Welford) y dos estados se pueden fusionar sin volver a leer filas.
+    """
+
+    def __init__(self, columns, n=0, mean=None, m2=None):
+        k = len(columns)
+        self.columns = list(columns)
+        self.n = n
+        self.mean = np.zeros(k) if mean is None else np.asarray(mean, dtype=float)
+        self.m2 = np.zeros((k, k)) if m2 is None else np.asarray(m2, dtype=float)
+
+    @classmethod
+    def from_frame(cls, df, columns=METRIC_COLS):
+        """Crea el estado a partir de un DataFrame."""
+        x = df[columns].to_numpy(dtype=float)
+        if len(x) == 0:
+            return cls(columns)
+        mean = x.mean(axis=0)
+        d = x - mean
+        return cls(columns, len(x), mean, d.T @ d)
+
+    def push(self, values):
+        """Añade una observación (actualización de Welford)."""
+        x = np.asarray(values, dtype=float)
+        self.n += 1
+        delta = x - self.mean
+        self.mean = self.mean + delta / self.n
+        self.m2 = self.m2 + np.outer(delta, x - self.mean)
+        return self
+
+    def merge(self, other):
+        """Fusiona dos estados (Chan et al.) y devuelve uno nuevo."""
+        n = self.n + other.n
+        if n == 0:
+            return Moments(self.columns)
+        delta = other.mean - self.mean
+        mean = self.mean + delta * other.n / n
+        m2 = self.m2 + other.m2 + np.outer(delta, delta) * self.n * other.n / n
+        return Moments(self.columns, n, mean, m2)
+
+    __add__ = merge
+
+    def means(self):
+        """Medias por columna (NaN si no hay observaciones)."""
+        return pd.Series(self.mean if self.n else np.nan, index=self.columns)
+
+    def cov(self):
+        """Matriz de covarianzas muestral (ddof=1), igual que `DataFrame.cov()`."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            c = self.m2 / (self.n - 1) if self.n > 1 else np.full_like(self.m2, np.nan)
+        return pd.DataFrame(c, index=self.columns, columns=self.columns)
+
+    def std(self):
+        """Desviación estándar muestral (ddof=1), igual que `DataFrame.std()`."""
+        return pd.Series(np.sqrt(np.diag(self.cov().to_numpy())), index=self.columns)
+
+    def corr(self):
+        """Matriz de correlación de Pearson, igual que `DataFrame.corr()`."""
+        d = np.sqrt(np.diag(self.m2))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            c = self.m2 / np.outer(d, d)
+        return pd.DataFrame(c, index=self.columns, columns=self.columns)
+
+
+def _combine(n, mean, m2, columns):
+    """Fusiona de una vez un conjunto de estados dados como arrays (P,), (P, k) y (P, k, k)."""
+    total = n.sum()
+    if total == 0:
+        return Moments(columns)
+    mu = (n[:, None] * mean).sum(axis=0) / total
+    d = mean - mu
+    return Moments(columns, int(total), mu, m2.sum(axis=0) + np.einsum("p,pi,pj->ij", n, d, d))
+
+
+class PartitionedMoments:
+    """
+    Un estado de momentos por partición de los datos. Las claves de partición son columnas de los
+    filtros con pocos valores, así que las selecciones sobre ellas se resuelven fusionando estados
+    parciales; `values` guarda los valores distintos del resto de columnas de los filtros.
+
+    Dentro de cada partición las filas se guardan ordenadas por fecha con sumas acumuladas de los
+    valores y de sus productos (centrados en la media global): el estado de una partición entre dos
+    fechas es la diferencia de dos prefijos, localizados con `searchsorted`.
+    """
+
+    def __init__(self, keys, part, lo, hi, base):
+        self.keys = keys        # Claves de cada partición
+        self.part = part        # Código de cada partición en `base`
+        self.lo = lo            # Tramo de filas [lo, hi) de cada partición dentro de `base`
+        self.hi = hi
+        self.base = base        # Filas ordenadas por (partición, fecha) y sus sumas acumuladas
+        self.columns = base["columns"]
+        self.values = base["values"]  # Columna no clave -> valores distintos (incluido NaN)
+        self.n = hi - lo
+
+    def _sums(self):
+        """Sumas (centradas) de valores y de productos de cada partición: diferencias de prefijos."""
+        c1, c2 = self.base["c1"], self.base["c2"]
+        return c1[self.hi] - c1[self.lo], c2[self.hi] - c2[self.lo]
+
+    @property
+    def mean(self):
+        """Medias por partición (P, k)."""
+        return self.base["center"] + self._sums()[0] / self.n[:, None]
+
+    @property
+    def m2(self):
+        """Co-momentos centrados por partición (P, k, k)."""
+        s1, s2 = self._sums()
+        return s2 - s1[:, :, None] * s1[:, None, :] / self.n[:, None, None]
+
+    @classmethod
+    def from_frame(cls, df, columns=METRIC_COLS, keys=PARTITION_KEYS):
+        keys = [k for k in keys if k in df.columns]
+        df = df[df["Date"].notna()]  # Sin fecha, ningún rango de fechas incluye la fila
+        x = df[columns].to_numpy(dtype=float)
+        days = df["Date"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+        first_day = int(days.min()) if len(days) else 0
+        span = int(days.max()) - first_day + 2 if len(days) else 1
+
+        codes = df.groupby(keys, sort=False, dropna=False).ngroup().to_numpy()
+        position = codes.astype(np.int64) * span + (days - first_day)  # Orden por (partición, fecha)
+        order = np.argsort(position, kind="stable")
+        center = x.mean(axis=0) if len(x) else np.zeros(len(columns))
+        d = x[order] - center
+        k = len(columns)
+        base = {
+            "columns": list(columns), "center": center, "span": span, "first_day": first_day,
+            "values": {col: pd.Series(df[col].unique()) for col in RESIDUAL_COLS if col in df.columns},
+            "position": position[order],
+            "c1": np.vstack([np.zeros((1, k)), np.cumsum(d, axis=0)]),
+            "c2": np.concatenate([np.zeros((1, k, k)), np.cumsum(d[:, :, None] * d[:, None, :], axis=0)]),
+        }
+
+        n = np.bincount(codes, minlength=0) if len(codes) else np.zeros(0, dtype=np.int64)
+        bounds = np.concatenate(([0], np.cumsum(n)))
+        # Claves categóricas: los filtros (`isin`) sobre las particiones comparan códigos, no cadenas
+        key_frame = df.iloc[order[bounds[:-1]]][keys].reset_index(drop=True)
+        key_frame = key_frame.astype({k: "category" for k in keys if key_frame[k].dtype == object})
+        return cls(key_frame, np.arange(len(n)), bounds[:-1], bounds[1:], base)
+
+    def select(self, mask, date_range=None):
+        """
+        Subconjunto de particiones según una máscara booleana sobre `keys` y, opcionalmente, sólo
+        las filas entre dos fechas (inclusive).
+        """
+        mask = np.asarray(mask, dtype=bool)
+        part, lo, hi = self.part[mask], self.lo[mask], self.hi[mask]
+        if date_range is not None:
+            base = self.base
+            first, last = (pd.Timestamp(d).to_datetime64().astype("datetime64[D]").astype(np.int64) - base["first_day"]
+                           for d in date_range)
+            first, last = np.clip([first, last], -1, base["span"] - 1)
+            lo = np.maximum(lo, np.searchsorted(base["position"], part * base["span"] + first, side="left"))
+            hi = np.minimum(hi, np.searchsorted(base["position"], part * base["span"] + last, side="right"))
+            keep = hi > lo
+            part, lo, hi = part[keep], lo[keep], hi[keep]
+            mask = np.flatnonzero(mask)[keep]
+        return PartitionedMoments(self.keys.iloc[mask].reset_index(drop=True), part, lo, hi, self.base)
+
+    def total(self):
+        """Estado fusionado de todas las particiones (directamente de las sumas de sus prefijos)."""
+        total = int(self.n.sum())
+        if total == 0:
+            return Moments(self.columns)
+        c1, c2 = self.base["c1"], self.base["c2"]
+        s1 = c1[self.hi].sum(axis=0) - c1[self.lo].sum(axis=0)
+        s2 = c2[self.hi].sum(axis=0) - c2[self.lo].sum(axis=0)
+        return Moments(self.columns, total, self.base["center"] + s1 / total, s2 - np.outer(s1, s1) / total)
+
+    def by(self, key):
+        """Estado fusionado por cada valor de una clave de partición (p.ej. 'Result')."""
+        return {value: self.select((self.keys[key] == value).to_numpy()).total()
+                for value in self.keys[key].dropna().unique()}
+
+    def rolling_corr(self, col_a, col_b, window_days=90):
+        """
+        Correlación móvil entre dos columnas en una ventana de `window_days` días, a partir de las
+        sumas por día de las filas seleccionadas y de sus sumas acumuladas.
+        """
+        if self.n.sum() == 0:
+            return pd.DataFrame(columns=["Date", "Correlation", "Partidos"])
+        i, j = self.columns.index(col_a), self.columns.index(col_b)
+        # Filas seleccionadas: los tramos [lo, hi) de cada partición
+        offsets = np.repeat(self.lo - np.concatenate(([0], np.cumsum(self.n)[:-1])), self.n)
+        rows = offsets + np.arange(self.n.sum())
+        c1 = self.base["c1"]
+        d = (c1[rows + 1] - c1[rows])[:, [i, j]]  # Valores centrados en la media global
+        days = self.base["position"][rows] % self.base["span"]
+
+        daily = pd.DataFrame({
+            "day": days, "n": 1, "sa": d[:, 0], "sb": d[:, 1],
+            "saa": d[:, 0] ** 2, "sbb": d[:, 1] ** 2, "sab": d[:, 0] * d[:, 1],
+        }).groupby("day").sum().sort_index()
+
+        prefix = np.vstack([np.zeros(daily.shape[1]), daily.to_numpy().cumsum(axis=0)])
+        day_index = daily.index.to_numpy()
+        start = np.searchsorted(day_index, day_index - (window_days - 1))
+        w = prefix[np.arange(1, len(day_index) + 1)] - prefix[start]
+        n, sa, sb, saa, sbb, sab = w.T
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = sab - sa * sb / n
+            var_a = saa - sa * sa / n
+            var_b = sbb - sb * sb / n
+            corr = cov / np.sqrt(var_a * var_b)
+        dates = (day_index + self.base["first_day"]).astype("datetime64[D]").astype("datetime64[ns]")
+        return pd.DataFrame({"Date": dates, "Correlation": corr, "Partidos": n.astype(int)})
+
+
+def build_partitioned_moments(df, keys=PARTITION_KEYS):
+    """
+    Estados de momentos por partición para el DataFrame completo, o None si las particiones no
+    serían compactas (se comprueba antes de calcular las sumas acumuladas).
+    """
+    keys = [k for k in keys if k in df.columns]
+    dated = df[df["Date"].notna()]
+    if len(dated) < MIN_ROWS_PER_PARTITION * dated.groupby(keys, sort=False, dropna=False).ngroups:
+        return None
+    return PartitionedMoments.from_frame(dated, keys=keys)
@@ -0,0 +1,109 @@
+# pagination.py
+"""
+Tabla paginada en el servidor: el orden de las filas sale de permutaciones precalculadas para las
+claves de ordenación habituales y al navegador sólo se envía la página visible (y las columnas
+elegidas), así que el coste por página no depende del tamaño del historial.
+"""
+import math
+import threading
+import weakref
+from collections import OrderedDict
+
+import streamlit as st
+import pandas as pd
+import numpy as np
+
+SORT_KEYS = ["Date", "Merit", "Game-Diff"]
+PAGE_SIZES = [25, 50, 100, 250]
+MAX_CACHED_MASKS = 16
+
+_masks = OrderedDict()  # (id(DataFrame), término) -> (weakref, máscara) (LRU)
+_masks_lock = threading.Lock()
+
+
+def sort_permutations(df, keys=SORT_KEYS):
+    """
+    Permutaciones de filas (posiciones) para ordenar `df` por cada clave, ascendente y descendente.
+    Los valores nulos quedan siempre al final; los empates conservan el orden original.
+    """
+    orders = {}
+    for key in keys:
+        if key not in df.columns:
+            continue
+        values = df[key]
+        values = values.astype("int64") if pd.api.types.is_datetime64_any_dtype(values) else values.astype(float)
+        values = values.to_numpy()
+        nulls = np.flatnonzero(df[key].isna().to_numpy())
+        valid = np.flatnonzero(df[key].notna().to_numpy())
+        asc = valid[np.argsort(values[valid], kind="stable")]
+        # Descendente estable: se invierte el orden ascendente de los valores negados
+        desc = valid[np.argsort(-values[valid], kind="stable")]
+        orders[key] = {True: np.concatenate([asc, nulls]), False: np.concatenate([desc, nulls])}
+    return orders
+
+
+def search_mask(df, term):
+    """
+    Filas que contienen `term` en alguna columna (sin distinguir mayúsculas). Se recuerda por
+    identidad del DataFrame (el de la vista cacheada, que no se modifica) y término.
+    """
+    key = (id(df), term)
+    with _masks_lock:
+        entry = _masks.get(key)
+        if entry is not None and entry[0]() is df:
+            _masks.move_to_end(key)
+            return entry[1]
+    mask = df.astype(str).apply(lambda x: x.str.contains(term, case=False, na=False, regex=False)).any(axis=1).to_numpy()
+    with _masks_lock:
+        _masks[key] = (weakref.ref(df), mask)
+        while len(_masks) > MAX_CACHED_MASKS:
+            _masks.popitem(last=False)
+    return mask
+
+
+def cache_bytes():
+    """Bytes de las máscaras de búsqueda recordadas."""
+    with _masks_lock:
+        return sum(mask.nbytes for _, mask in _masks.values())
+
+
+def clear_cache():
+    with _masks_lock:
+        _masks.clear()
+
+
+def page_slice(df, order, page, page_size, columns=None, mask=None):
+    """Filas de la página `page` (desde 1) según la permutación `order`, proyectadas a `columns`."""
+    if mask is not None:
+        order = order[mask[order]]
+    start = (page - 1) * page_size
+    rows = df.iloc[order[start:start + page_size]]
+    return (rows[columns] if columns is not None else rows).reset_index(drop=True), len(order)
+
+
+def paginated_table(df, orders, key, default_sort="Date", mask=None):
+    """Tabla paginada y ordenable con selección de columnas; devuelve la página mostrada."""
+    sort_keys = list(orders)
+    col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
+    with col1:
+        columns = st.multiselect("Columnas", list(df.columns), default=list(df.columns), key=f"{key}_columns")
+    with col2:
+        sort_by = st.selectbox("Ordenar por", sort_keys,
+                               index=sort_keys.index(default_sort) if default_sort in sort_keys else 0,
+                               key=f"{key}_sort")
+    with col3:
+        ascending = st.radio("Orden", ["Desc.", "Asc."], horizontal=True, key=f"{key}_order") == "Asc."
+    with col4:
+        page_size = st.selectbox("Filas por página", PAGE_SIZES, key=f"{key}_page_size")
+
+    total = int(mask.sum()) if mask is not None else len(df)
+    pages = max(1, math.ceil(total / page_size))
+    if st.session_state.get(f"{key}_page", 1) > pages:  # Menos páginas tras filtrar o buscar
+        st.session_state[f"{key}_page"] = pages
+    page = int(st.number_input(f"Página (de {pages})", min_value=1, max_value=pages, step=1, key=f"{key}_page"))
+
+    view, total = page_slice(df, orders[sort_by][ascending], page, page_size, columns or None, mask)
+    st.dataframe(view, use_container_width=True, hide_index=True)
+    first = (page - 1) * page_size + 1 if total else 0
+    st.caption(f"Filas {first}–{min(page * page_size, total)} de {total}")
+    return view
@@ -0,0 +1,205 @@
+# prediction.py
+"""
+Modelo de predicción de victoria: regresión logística (NumPy) sobre los factores categóricos de un
+partido — compañero, lugar, rival, franja horaria y día de la semana — con regularización L2.
+
+Cada factor activa un único peso, así que el gradiente y el hessiano se acumulan con `bincount`
+sobre índices (sin matriz one-hot) y el ajuste es un Newton exacto de pocas iteraciones. Al llegar
+filas nuevas, el modelo se re-entrena partiendo de los pesos anteriores y converge en pocos pasos.
+La inferencia por lotes puntúa miles de configuraciones hipotéticas sumando pesos indexados.
+"""
+import threading
+import time
+
+import pandas as pd
+import numpy as np
+
+from insights import HOUR_BUCKETS, hour_buckets
+
+FACTORS = ["Teammate", "Location", "Opponent", "Franja", "Weekday"]
+L2 = 1.0           # Regularización: los valores con pocos partidos se quedan cerca de 0
+MAX_ITER = 25
+TOL = 1e-6
+
+
+def _factor_values(df):
+    """Valores de cada factor disponible en `df` (la franja, si no viene dada, se deriva de `Hour`)."""
+    values = {}
+    for factor in FACTORS:
+        if factor == "Franja" and "Franja" not in df.columns:
+            if "Hour" in df.columns:
+                codes = hour_buckets(df["Hour"])
+                values[factor] = np.where(codes >= 0, np.array(HOUR_BUCKETS, dtype=object)[np.maximum(codes, 0)], None)
+        elif factor in df.columns:
+            values[factor] = df[factor].to_numpy(dtype=object)
+    return values
+
+
+class ModelState:
+    """
+    Estado completo de un ajuste. No se modifica una vez publicado: `fit` construye uno nuevo y lo
+    sustituye de una vez, así que quien lee `WinModel.state` una sola vez ve siempre pesos, índices
+    y factores del mismo ajuste, sin tomar el lock.
+    """
+
+    def __init__(self, factors=(), features=None, weights=None, data_hash=None, snapshot=None, info=None):
+        self.factors = tuple(factors)
+        self.features = features or {}  # (factor, valor) -> índice de peso (desde 2)
+        # weights[0]: valor desconocido (siempre 0); weights[1]: término independiente
+        self.weights = np.zeros(2) if weights is None else weights
+        self.weights.flags.writeable = False
+        self.data_hash = data_hash
+        self.snapshot = snapshot        # Snapshot de datos con el que se ha entrenado (ver get_model)
+        self.info = info or {}
+
+
+class WinModel:
+    """Regresión logística con un peso por valor de cada factor más un término independiente."""
+
+    def __init__(self):
+        self._lock = threading.Lock()  # Serializa los ajustes; las lecturas no lo necesitan
+        self.reset()
+
+    def reset(self):
+        """Vuelve al modelo sin entrenar (el siguiente `get_model` lo re-entrena)."""
+        with self._lock:
+            self.state = ModelState()
+
+    @property
+    def snapshot(self):
+        return self.state.snapshot
+
+    @property
+    def info(self):
+        return self.state.info
+
+    # --- Codificación ---
+    @staticmethod
+    def _index(values, factors, features, grow=False):
+        """Matriz (filas, factores) de índices de peso; 0 = valor desconocido o ausente (sin efecto)."""
+        columns = []
+        for factor in factors:
+            col = values.get(factor)
+            if col is None:
+                columns.append(np.zeros(len(next(iter(values.values()))), dtype=np.int64))
+                continue
+            inverse, uniques = pd.factorize(pd.Series(col, dtype=object))
+            if len(uniques) == 0:  # Factor sin ningún valor
+                columns.append(np.zeros(len(col), dtype=np.int64))
+                continue
+            lookup = np.zeros(len(uniques), dtype=np.int64)
+            for i, value in enumerate(uniques):
+                key = (factor, value)
+                if key not in features and grow:
+                    features[key] = len(features) + 2
+                lookup[i] = features.get(key, 0)
+            columns.append(np.where(inverse >= 0, lookup[np.maximum(inverse, 0)], 0))
+        return np.column_stack(columns)
+
+    # --- Entrenamiento ---
+    def fit(self, df, snapshot=None):
+        """
+        Ajusta (o re-ajusta en caliente) el modelo con todo `df`. Si los datos no han cambiado no
+        hace nada (con `snapshot`, sin recorrer `df`); si hay filas nuevas parte de los pesos actuales.
+        """
+        with self._lock:
+            state = self.state
+            if snapshot is not None and snapshot == state.snapshot:
+                return self
+            data_hash = int(pd.util.hash_pandas_object(df[[c for c in df.columns if c in FACTORS + ["Hour", "Result"]]],
+                                                       index=False).sum())
+            if data_hash == state.data_hash:
+                self.state = ModelState(state.factors, state.features, state.weights, data_hash, snapshot, state.info)
+                return self
+            start = time.perf_counter()
+            # Se trabaja sobre copias y se publica un estado nuevo al final: las lecturas ven un modelo completo
+            values = _factor_values(df)
+            factors, features = [f for f in FACTORS if f in values], dict(state.features)
+            idx = self._index(values, factors, features, grow=True)
+            y = (df["Result"] == "W").to_numpy(dtype=float)
+
+            d = len(features) + 2
+            w = np.zeros(d)
+            w[:len(state.weights)] = state.weights  # Arranque en caliente con los pesos anteriores
+            rows = np.column_stack([np.ones(len(y), dtype=np.int64), idx])  # Columna 1: término independiente
+            penalty = np.full(d, L2)
+            penalty[1] = 0.0
+
+            iterations = 0
+            for iterations in range(1, MAX_ITER + 1):
+                p = 1 / (1 + np.exp(-w[rows].sum(axis=1)))
+                r, s = p - y, p * (1 - p)
+                grad = penalty * w
+                hess = np.diag(penalty)
+                for a in range(rows.shape[1]):
+                    grad += np.bincount(rows[:, a], weights=r, minlength=d)
+                    for b in range(rows.shape[1]):
+                        hess += np.bincount(rows[:, a] * d + rows[:, b], weights=s, minlength=d * d).reshape(d, d)
+                # El índice 0 (valor desconocido) no se ajusta: su peso es siempre 0
+                step = np.linalg.solve(hess[1:, 1:] + 1e-9 * np.eye(d - 1), grad[1:])
+                w[1:] -= step
+                if np.abs(step).max() < TOL:
+                    break
+
+            p = np.clip(1 / (1 + np.exp(-w[rows].sum(axis=1))), 1e-12, 1 - 1e-12)
+            self.state = ModelState(factors, features, w, data_hash, snapshot, {
+                "Partidos": len(y),
+                "Parámetros": d,
+                "Iteraciones": iterations,
+                "LogLoss": float(-(y * np.log(p) + (1 - y) * np.log(1 - p)).mean()) if len(y) else np.nan,
+                "Acierto": float(((p >= 0.5) == y).mean()) if len(y) else np.nan,
+                "Tiempo_ms": (time.perf_counter() - start) * 1000,
+            })
+        return self
+
+    # --- Inferencia ---
+    def predict(self, configs):
+        """
+        Probabilidad de victoria de cada fila de `configs` (columnas: factores; la franja puede darse
+        como `Franja` o como `Hour` con `datetime.time`). Los factores ausentes o con valores no vistos no aportan nada.
+        """
+        state = self.state
+        values = _factor_values(configs)
+        if not values or not state.factors:
+            return np.full(len(configs), 1 / (1 + np.exp(-state.weights[1])))
+        idx = self._index(values, state.factors, state.features)
+        return 1 / (1 + np.exp(-(state.weights[1] + state.weights[idx].sum(axis=1))))
+
+    def plan(self, options, top_k=10):
+        """
+        Puntúa todas las combinaciones de `options` ({factor: [valores]}) sin construir la tabla
+        completa: la suma de pesos se hace por difusión (broadcast) entre factores.
+        """
+        state = self.state
+        factors = [f for f in state.factors if options.get(f)]
+        logits = np.full((), state.weights[1])
+        for factor in factors:
+            w = np.array([state.weights[state.features.get((factor, v), 0)] for v in options[factor]])
+            logits = np.add.outer(logits, w)
+        prob = 1 / (1 + np.exp(-logits.ravel()))
+        best = np.argsort(-prob, kind="stable")[:top_k]
+        shape = [len(options[f]) for f in factors]
+        positions = np.unravel_index(best, shape) if shape else []
+        plan = pd.DataFrame({f: np.asarray(options[f], dtype=object)[pos] for f, pos in zip(factors, positions)})
+        plan["Probabilidad_Victoria"] = prob[best] * 100
+        return plan, prob.size
+
+    def effects(self):
+        """Efecto (peso en escala logit) de cada valor de cada factor."""
+        state = self.state
+        return pd.DataFrame(
+            [{"Factor": f, "Valor": v, "Efecto": state.weights[i]} for (f, v), i in state.features.items()]
+        ).sort_values("Efecto", ascending=False, ignore_index=True)
+
+
+win_model = WinModel()
+
+
+def get_model(snapshot, load_full):
+    """
+    Modelo compartido entre sesiones, entrenado con el historial completo del snapshot de datos
+    (nunca con los datos de unos filtros). `load_full()` sólo se llama cuando cambia el snapshot.
+    """
+    if snapshot is not None and snapshot == win_model.snapshot:
+        return win_model
+    return win_model.fit(load_full(), snapshot)
@@ -0,0 +1,162 @@
+# sources.py
+"""
+Carga federada de varias fuentes de partidos (pestañas u hojas por temporada o por jugador).
+
+Las fuentes se descargan y procesan en paralelo en un pool de hilos y se unen en una sola tabla
+con la columna `Source`. Cada fuente recuerda sus validadores HTTP (`ETag` / `Last-Modified`) y la
+huella de su contenido: en una recarga sólo se vuelven a procesar las fuentes que han cambiado.
+
+Las fuentes se configuran con `PADEL_SOURCES`, ruta a un JSON con una lista de objetos
+`{"name": ..., "url": ...}` con nombres distintos; `url` puede ser una URL http(s) o una ruta a un CSV local.
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+
+import pandas as pd
+
+DEFAULT_SOURCES = [{
+    "name": "Principal",
+    "url": "https://docs.google.com/spreadsheets/d/e/2PACX-1vR3HRJ4LcbIqwxl2ffbR-HDjXgG_dNyetWGTOLfcHGU9yl4lGYki2LoFR2hbLdcyCS1bLwPneVSDwCZ/pub?gid=0&single=true&output=csv",
+}]
+NUMERIC_COLS = ["Merit", "Game-Diff", "Quimica", "Rendiment"]
+MAX_WORKERS = 8
+REFRESH_TTL = 600  # Segundos entre comprobaciones de cambios en las fuentes
+TIMEOUT_S = 30
+
+
+def configured_sources():
+    """Fuentes configuradas en `PADEL_SOURCES` (o la hoja por defecto)."""
+    path = os.environ.get("PADEL_SOURCES")
+    if not path:
+        return DEFAULT_SOURCES
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def fetch(url, validators=None):
+    """
+    Descarga una fuente. Con `validators` de la descarga anterior hace una petición condicional;
+    devuelve `(contenido o None si no ha cambiado, validadores nuevos)`.
+    """
+    validators = validators or {}
+    if not url.startswith(("http://", "https://")):
+        modified = str(os.path.getmtime(url))
+        if validators.get("Last-Modified") == modified:
+            return None, validators
+        with open(url, "rb") as f:
+            return f.read(), {"Last-Modified": modified}
+
+    request = urllib.request.Request(url)
+    if validators.get("ETag"):
+        request.add_header("If-None-Match", validators["ETag"])
+    if validators.get("Last-Modified"):
+        request.add_header("If-Modified-Since", validators["Last-Modified"])
+    try:
+        with urllib.request.urlopen(request, timeout=TIMEOUT_S) as response:
+            content = response.read()
+            headers = {k: response.headers.get(k) for k in ("ETag", "Last-Modified") if response.headers.get(k)}
+            return content, headers
+    except HTTPError as e:
+        if e.code == 304:
+            return None, validators
+        raise
+
+
+def parse_matches(content):
+    """Convierte el CSV de una fuente en la tabla de partidos tipada."""
+    df = pd.read_csv(io.BytesIO(content), parse_dates=["Date"], dayfirst=True)
+    df["Date"] = pd.to_datetime(df["Date"], dayfirst=True, errors="coerce")
+    df["Hour"] = pd.to_datetime(df["Hour"], format="%H:%M", errors="coerce").dt.time
+    df["Year"] = df["Date"].dt.year
+    df["Month"] = df["Date"].dt.month_name()
+    df["Weekday"] = df["Date"].dt.day_name()
+
+    missing = []
+    for col in NUMERIC_COLS:
+        if col in df.columns:
+            df[col] = df[col].astype(str).str.replace(',', '.', regex=False)
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+        else:
+            df[col] = 0
+            missing.append(col)
+
+    df["Rating"] = df["Merit"]  # 'Rating' ahora es el 'Merit' del partido.
+    return df, missing
+
+
+class FederatedLoader:
+    """Estado por fuente (validadores, huella y tabla procesada) compartido entre recargas."""
+
+    def __init__(self, max_workers=MAX_WORKERS):
+        self._state = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sources")
+
+    def reset(self):
+        """Olvida validadores, huellas y tablas: la siguiente carga descarga y procesa todas las fuentes."""
+        with self._lock:
+            self._state.clear()
+
+    def _refresh(self, source):
+        """Descarga y, si ha cambiado, procesa una fuente. Devuelve `(estado, cambiada)`."""
+        with self._lock:
+            previous = self._state.get((source["name"], source["url"]), {})
+        content, validators = fetch(source["url"], previous.get("validators"))
+        if content is None:
+            return previous, False
+        digest = hashlib.sha1(content).hexdigest()
+        if digest == previous.get("digest"):
+            return dict(previous, validators=validators), False
+        frame, missing = parse_matches(content)
+        frame["Source"] = source["name"]
+        return {"validators": validators, "digest": digest, "frame": frame, "missing": missing}, True
+
+    def load(self, sources):
+        """
+        Tabla unificada de todas las fuentes, ordenada por fecha. Devuelve `(df, informe)`, con
+        el informe por fuente: filas, si se ha re-procesado y el error si la descarga ha fallado
+        (en ese caso se usa la última versión buena, si existe).
+        """
+        names = [source["name"] for source in sources]
+        duplicated = sorted({name for name in names if names.count(name) > 1})
+        if duplicated:  # El nombre identifica la fuente en la columna `Source` y en el estado guardado
+            raise ValueError(f"nombres de fuente repetidos: {', '.join(duplicated)}")
+        futures = {source["name"]: self._pool.submit(self._refresh, source) for source in sources}
+        frames, report = [], []
+        for source in sources:
+            name = source["name"]
+            try:
+                state, changed = futures[name].result()
+                error = None
+            except Exception as e:
+                with self._lock:
+                    state, changed, error = self._state.get((name, source["url"]), {}), False, str(e)
+            with self._lock:
+                if state:
+                    self._state[(name, source["url"])] = state
+            if "frame" in state:
+                frames.append(state["frame"])
+            report.append({"Source": name, "Filas": len(state.get("frame", [])), "Actualizada": changed,
+                           "Columnas_ausentes": state.get("missing", []), "Error": error,
+                           "Huella": state.get("digest")})
+
+        if not frames:
+            return pd.DataFrame(), report
+        df = pd.concat(frames, ignore_index=True)
+        df = df.sort_values(by="Date", kind="stable").reset_index(drop=True)
+        return df, report
+
+
+def snapshot_id(report):
+    """Huella del conjunto de fuentes cargadas (a partir del informe de `FederatedLoader.load`)."""
+    parts = sorted(f"{source['Source']}:{source['Huella']}" for source in report if source["Huella"])
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+federated_loader = FederatedLoader()
@@ -0,0 +1,116 @@
+# startup.py
+"""
+Herramientas de arranque del dashboard.
+
+    python startup.py profile             Tiempo de cada import y de cada etapa de inicialización.
+    python startup.py warm [-- args]      Precarga datos y cachés y después arranca el servidor
+                                          (`streamlit run streamlit_app.py [args]`) en el mismo proceso.
+"""
+import argparse
+import re
+import runpy
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent
+APP_FILE = APP_DIR / "streamlit_app.py"
+
+# Imports en el orden en que los hace la aplicación
+EAGER_IMPORTS = ["streamlit", "pandas", "numpy", "aggregations", "utils", "sources", "storage", "moments", "intervals", "charts", "taskgraph", "pagination", "insights", "prediction", "memory", "views", "tabs.jugadores",
+                 "tabs.lugares", "tabs.temporal", "tabs.graficos", "tabs.datos", "tabs.estadisticas",
+                 "tabs.nuevos_analisis", "tabs.dataframes_tab"]
+# Diferidos pero dentro del primer pintado: st.tabs ejecuta todas las pestañas en cada ejecución,
+# así que los gráficos (altair) se importan siempre en la primera
+FIRST_PAINT_IMPORTS = ["altair"]
+# Sólo al descargar el Excel de la pestaña Datos, fuera del primer pintado
+DEFERRED_IMPORTS = ["xlsxwriter"]
+
+
+def import_times(modules):
+    """Tiempo acumulado (ms) de cada import de primer nivel en un intérprete limpio (`-X importtime`)."""
+    code = "; ".join(f"import {m}" for m in modules)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=APP_DIR,
+                          capture_output=True, text=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        m = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\S.*)$", line)
+        # Sólo los módulos de primer nivel (sin sangría) y los paquetes de `tabs`
+        if m and m.group(2).strip() in modules:
+            times[m.group(2).strip()] = int(m.group(1)) / 1000
+    return times
+
+
+@contextmanager
+def stage(name, report):
+    start = time.perf_counter()
+    yield
+    report.append((name, (time.perf_counter() - start) * 1000))
+
+
+def run_app_once():
+    """Ejecuta `streamlit_app.py` sin servidor (modo 'bare'): carga imports y rellena las cachés."""
+    runpy.run_path(str(APP_FILE), run_name="__main__")
+
+
+def warm_caches(report=None):
+    """Precarga el snapshot de datos, las cachés de cálculo y las plantillas de gráficos."""
+    report = [] if report is None else report
+    sys.path.insert(0, str(APP_DIR))
+    with stage("Imports de la aplicación", report):
+        import utils  # noqa: F401
+        import views
+    with stage("load_data (snapshot de datos)", report):
+        df, snapshot = utils.load_data()
+    with stage("Momentos por partición", report):
+        views.partitioned_moments(snapshot, lambda: df)
+    with stage("Ejecución completa del script (fría)", report):
+        run_app_once()
+    with stage("Ejecución completa del script (caliente)", report):
+        run_app_once()
+    return report
+
+
+def profile():
+    modules = EAGER_IMPORTS + FIRST_PAINT_IMPORTS + DEFERRED_IMPORTS
+    times = import_times(modules)
+    print("== Imports (ms, acumulado en orden de carga) ==")
+    for module in modules:
+        label = (f"{module} (al pintar)" if module in FIRST_PAINT_IMPORTS
+                 else f"{module} (diferido)" if module in DEFERRED_IMPORTS else module)
+        print(f"{label:<35}{times.get(module, 0.0):>10.1f}")
+    first_paint = sum(times.get(m, 0.0) for m in EAGER_IMPORTS + FIRST_PAINT_IMPORTS)
+    print(f"{'Total antes del primer pintado':<35}{first_paint:>10.1f}")
+
+    print("\n== Etapas de inicialización (ms) ==")
+    for name, ms in warm_caches():
+        print(f"{name:<45}{ms:>10.1f}")
+
+
+def warm(streamlit_args):
+    start = time.perf_counter()
+    warm_caches()
+    print(f"Cachés precargadas en {time.perf_counter() - start:.1f}s; arrancando el servidor...")
+
+    # Mismo proceso: las cachés de st.cache_data y de gráficos ya están llenas para el primer usuario
+    from streamlit.web import cli as stcli
+    sys.argv = ["streamlit", "run", str(APP_FILE), *streamlit_args]
+    sys.exit(stcli.main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perfilado de arranque y arranque en caliente del dashboard.")
+    parser.add_argument("command", choices=["profile", "warm"])
+    parser.add_argument("streamlit_args", nargs=argparse.REMAINDER, help="Argumentos para `streamlit run`")
+    args = parser.parse_args()
+
+    if args.command == "profile":
+        profile()
+    else:
+        warm([a for a in args.streamlit_args if a != "--"])
+
+
+if __name__ == "__main__":
+    main()
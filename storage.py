@@ -0,0 +1,132 @@
+# storage.py
+"""
+Almacenamiento de la tabla de partidos particionada por año (un Parquet por `Year`).
+
+Un `manifest.json` guarda, para cada partición, su rango de fechas, número de filas y huella,
+además de las opciones de los filtros. Así la barra lateral se construye sin leer datos y sólo
+se cargan del disco las particiones que tocan el año / rango de fechas seleccionado.
+
+Para generar (o actualizar de forma incremental) el almacén desde la hoja de cálculo:
+    python storage.py --out data_store
+y después arrancar el dashboard con `PADEL_STORE=data_store streamlit run streamlit_app.py`.
+"""
+import argparse
+import hashlib
+import json
+from pathlib import Path
+
+import streamlit as st
+import pandas as pd
+import numpy as np
+
+MANIFEST = "manifest.json"
+
+
+def date_window(dates, years, date_range):
+    """
+    Rango contiguo de filas (ordenadas por `Date`) que cubre los años y fechas seleccionados.
+    Se resuelve con `searchsorted`, sin recorrer las filas.
+    """
+    if len(years) == 0:
+        return slice(0, 0)
+    start = max(pd.to_datetime(date_range[0]), pd.Timestamp(int(min(years)), 1, 1))
+    end = min(pd.to_datetime(date_range[1]), pd.Timestamp(int(max(years)), 12, 31))
+    lo = np.searchsorted(dates, start.to_datetime64(), side="left")
+    hi = np.searchsorted(dates, end.to_datetime64(), side="right")
+    return slice(int(lo), int(max(lo, hi)))
+
+
+def _partition_hash(part):
+    return hashlib.sha1(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes()).hexdigest()[:16]
+
+
+def write_partitions(df, root):
+    """Escribe `df` particionado por año. Sólo reescribe los años cuyo contenido ha cambiado."""
+    from utils import build_filter_options
+
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    previous = read_manifest(root).get("partitions", {}) if (root / MANIFEST).exists() else {}
+
+    partitions, written = {}, 0
+    for year, part in df.groupby("Year", sort=True):
+        year = str(int(year))
+        digest = _partition_hash(part)
+        file = f"year={year}.parquet"
+        if previous.get(year, {}).get("hash") != digest or not (root / file).exists():
+            part.to_parquet(root / file, index=False)
+            written += 1
+        partitions[year] = {
+            "file": file,
+            "rows": len(part),
+            "min_date": part["Date"].min().isoformat(),
+            "max_date": part["Date"].max().isoformat(),
+            "hash": digest,
+        }
+
+    for path in root.glob("year=*.parquet"):
+        if path.name not in {p["file"] for p in partitions.values()}:
+            path.unlink()
+
+    manifest = {"partitions": partitions, "columns": list(df.columns), "options": build_filter_options(df)}
+    (root / MANIFEST).write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    return written, len(partitions)
+
+
+def read_manifest(root):
+    return json.loads((Path(root) / MANIFEST).read_text(encoding="utf-8"))
+
+
+@st.cache_data(show_spinner=False)
+def _read_partition(path, digest):
+    """Lee una partición; la huella forma parte de la clave de caché."""
+    return pd.read_parquet(path)
+
+
+class PartitionedStore:
+    """Acceso de sólo lectura a un almacén particionado por año."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.manifest = read_manifest(self.root)
+        self.options = self.manifest["options"]
+
+    @property
+    def snapshot(self):
+        """Huella del contenido del almacén (cambia cuando se reescribe alguna partición)."""
+        return hashlib.sha1("".join(p["hash"] for p in self.manifest["partitions"].values()).encode()).hexdigest()[:16]
+
+    def partitions_for(self, years, date_range):
+        """Años cuya partición se solapa con la selección."""
+        start, end = pd.to_datetime(date_range[0]), pd.to_datetime(date_range[1])
+        selected = {str(int(y)) for y in years}
+        return [
+            year for year, p in self.manifest["partitions"].items()
+            if year in selected and pd.Timestamp(p["min_date"]) <= end and pd.Timestamp(p["max_date"]) >= start
+        ]
+
+    def load(self, years, date_range):
+        """Carga (ordenadas por fecha) sólo las particiones que toca la selección."""
+        parts = [
+            _read_partition(str(self.root / self.manifest["partitions"][year]["file"]),
+                            self.manifest["partitions"][year]["hash"])
+            for year in sorted(self.partitions_for(years, date_range), key=int)
+        ]
+        if not parts:
+            return pd.DataFrame(columns=self.manifest["columns"])
+        return pd.concat(parts, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera el almacén de partidos particionado por año.")
+    parser.add_argument("--out", default="data_store", help="Directorio del almacén")
+    args = parser.parse_args()
+
+    from utils import load_data
+    df, _ = load_data()
+    written, total = write_partitions(df, args.out)
+    print(f"Particiones escritas: {written}/{total} -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
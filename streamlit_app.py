@@ -1,10 +1,21 @@
 # dashboard.py
+import os
 import streamlit as st
 import pandas as pd
 from datetime import datetime
 
 # Importar funciones de nuestros módulos
-from utils import load_data, create_performance_df
+from utils import load_data, build_filter_options
+from prediction import get_model
+from storage import PartitionedStore
+from memory import memory_manager, session_id, start_metrics_server
+from views import (
+    FILTER_KEYS,
+    get_view,
+    normalize_filters,
+    preset_registry,
+    schedule_prewarm
+)
 from tabs import (
     jugadores,
     lugares,
@@ -31,128 +42,199 @@ st.markdown(
 st.title("🎾 Dashboard Padel Avanzado")
 st.markdown("Explora tu rendimiento en pádel con estadísticas detalladas y visualizaciones interactivas.")
 
-# --- CARGA DE DATOS ---
-with st.spinner("Cargando datos de pádel..."):
-    df = load_data()
-
-if df.empty:
-    st.error("No se pudieron cargar los datos. Por favor, verifica la URL o los datos.")
-    st.stop()
-
-# --- FILTROS EN LA BARRA LATERAL ---
-with st.sidebar:
-    st.header("🎯 Filtros")
-
-    def create_multiselect_with_all(label, options, key):
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            selected = st.multiselect(label, options, default=options, key=key)
-        with col2:
-            if st.button("Todo", key=f"all_{key}", use_container_width=True):
-                st.session_state[key] = options
+# --- MEMORIA ---
+# Actividad de la sesión (para desalojar primero las sesiones inactivas) y métricas para Prometheus
+sid = session_id()
+memory_manager.begin_rerun(sid, st.session_state)
+if os.environ.get("PADEL_METRICS_PORT"):
+    start_metrics_server(os.environ["PADEL_METRICS_PORT"])
+
+# Todo el script va en try/finally: st.stop(), st.rerun() o una excepción también cierran la medición
+try:
+    # --- CARGA DE DATOS ---
+    # Con PADEL_STORE se usa el almacén particionado por año: las opciones de los filtros salen del
+    # manifiesto y sólo se leen del disco los años seleccionados (ver storage.py).
+    store = PartitionedStore(os.environ["PADEL_STORE"]) if os.environ.get("PADEL_STORE") else None
+    with st.spinner("Cargando datos de pádel..."):
+        if store is not None:
+            filter_options = store.options
+            snapshot = store.snapshot
+        else:
+            base_df, snapshot = load_data()
+            filter_options = build_filter_options(base_df) if not base_df.empty else None
+
+    if not filter_options:
+        st.error("No se pudieron cargar los datos. Por favor, verifica la URL o los datos.")
+        st.stop()
+
+    def load_full():
+        """Historial completo (para el modelo de predicción y los momentos por partición, no sólo los filtrados)."""
+        return store.load(filter_options["Year"], filter_options["Date"]) if store is not None else base_df
+
+    def load_for(filters):
+        """DataFrame base para unos filtros (en el almacén particionado, sólo los años necesarios)."""
+        return store.load(filters["year"], filters["date_range"]) if store is not None else base_df
+
+    # Presets de filtros: fijos + aprendidos del uso de todos los usuarios (ver views.py)
+    presets = preset_registry.presets(filter_options, None if store is not None else base_df["Location"].value_counts())
+    presets_by_name = {p["name"]: p for p in presets}
+
+    def apply_preset():
+        preset = presets_by_name.get(st.session_state["preset_choice"])
+        if preset is None:
+            return
+        for name, value in preset["filters"].items():
+            if (name == "opponent" and "Opponent" not in filter_options) or (name == "source" and "Source" not in filter_options):
+                continue
+            st.session_state[FILTER_KEYS[name]] = [pd.to_datetime(d).date() for d in value] if name == "date_range" else value
+
+    # --- FILTROS EN LA BARRA LATERAL ---
+    with st.sidebar:
+        st.header("🎯 Filtros")
+        st.selectbox("Vista rápida", ["—", *presets_by_name], key="preset_choice", on_change=apply_preset)
+
+        def create_multiselect_with_all(label, options, key):
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                selected = st.multiselect(label, options, default=options, key=key)
+            with col2:
+                # En un callback: el estado del multiselect no puede cambiarse una vez creado el widget
+                st.button("Todo", key=f"all_{key}", use_container_width=True,
+                          on_click=lambda: st.session_state.update({key: options}))
+            return selected
+
+        with st.expander("Opciones de filtrado", expanded=False):
+            year = create_multiselect_with_all("Año", filter_options["Year"], "year_filter")
+            month = create_multiselect_with_all("Mes", filter_options["Month"], "month_filter")
+            weekday = create_multiselect_with_all("Día de la semana", ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"], "weekday_filter")
+            location = create_multiselect_with_all("Lugar", filter_options["Location"], "location_filter")
+            teammate = create_multiselect_with_all("Compañero", filter_options["Teammate"], "teammate_filter")
+
+            opponent = []
+            if "Opponent" in filter_options:
+                opponent = create_multiselect_with_all("Rival", filter_options["Opponent"], "opponent_filter")
+
+            source = []
+            if "Source" in filter_options:
+                source = create_multiselect_with_all("Fuente", filter_options["Source"], "source_filter")
+
+            result = create_multiselect_with_all("Resultado", ["W", "L", "N"], "result_filter")
+            date_range = st.date_input("Rango de fechas", [pd.to_datetime(d) for d in filter_options["Date"]], key="date_filter")
+
+            if st.button("Restablecer filtros"):
+                for key in st.session_state.keys():
+                    if key.endswith('_filter'):
+                        del st.session_state[key]
                 st.rerun()
-        return selected
-
-    with st.expander("Opciones de filtrado", expanded=False):
-        year = create_multiselect_with_all("Año", sorted(df["Year"].dropna().unique()), "year_filter")
-        month = create_multiselect_with_all("Mes", sorted(df["Month"].dropna().unique(), key=lambda m: list(pd.to_datetime(df['Date']).dt.month_name().unique()).index(m)), "month_filter")
-        weekday = create_multiselect_with_all("Día de la semana", ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"], "weekday_filter")
-        location = create_multiselect_with_all("Lugar", sorted(df["Location"].dropna().unique()), "location_filter")
-        teammate = create_multiselect_with_all("Compañero", sorted(df["Teammate"].dropna().unique()), "teammate_filter")
-
-        opponent = []
-        if "Opponent" in df.columns:
-            opponent = create_multiselect_with_all("Rival", sorted(df["Opponent"].dropna().unique()), "opponent_filter")
-
-        result = create_multiselect_with_all("Resultado", ["W", "L", "N"], "result_filter")
-        date_range = st.date_input("Rango de fechas", [df["Date"].min(), df["Date"].max()])
-
-        if st.button("Restablecer filtros"):
-            for key in st.session_state.keys():
-                if key.endswith('_filter'):
-                    del st.session_state[key]
-            st.rerun()
-
-# --- APLICAR FILTROS ---
-filtered_df = df[
-    (df["Year"].isin(year)) &
-    (df["Month"].isin(month)) &
-    (df["Weekday"].isin(weekday)) &
-    (df["Location"].isin(location)) &
-    (df["Teammate"].isin(teammate)) &
-    (df["Result"].isin(result)) &
-    (df["Date"].between(pd.to_datetime(date_range[0]), pd.to_datetime(date_range[1])))
-]
-if "Opponent" in df.columns and opponent:
-    filtered_df = filtered_df[filtered_df["Opponent"].isin(opponent)]
-
-# --- MÉTRICAS GLOBALES ---
-st.subheader("📊 Resumen Global")
-if not filtered_df.empty:
-    col1, col2, col3, col4, col5, col6, col7, col8, col9 = st.columns(9)
-    total_games = len(filtered_df)
-    wins = (filtered_df['Result'] == 'W').sum()
-    losses = (filtered_df['Result'] == 'L').sum()
-    win_rate = (wins / total_games * 100) if total_games > 0 else 0
-    win_rate_no_draws = (wins / (wins + losses) * 100) if (wins + losses) > 0 else 0
-
-    col1.metric("Partidos", total_games)
-    col2.metric("Victorias", wins)
-    col3.metric("Derrotas", losses)
-    col4.metric("% Victorias", f"{win_rate:.1f}%")
-    col5.metric("% Victorias (s/ emp)", f"{win_rate_no_draws:.1f}%")
-    col6.metric("Merit Avg", f"{filtered_df['Merit'].mean():.2f}")
-    col7.metric("Química Avg", f"{filtered_df['Quimica'].mean():.2f}")
-    col8.metric("Rendim. Avg", f"{filtered_df['Rendiment'].mean():.2f}")
-    col9.metric("Dif. Juegos Avg", f"{filtered_df['Game-Diff'].mean():.2f}")
-else:
-    st.warning("No hay datos que coincidan con los filtros seleccionados.")
-    st.stop()
-
-
-# --- PRE-CÁLCULO DE DATAFRAMES DE RENDIMIENTO ---
-st.subheader("🎯 Análisis de Rendimiento Detallado")
-teammates_df = create_performance_df(filtered_df, 'Teammate', 'Compañero')
-locations_df = create_performance_df(filtered_df, 'Location', 'Lugar')
-
-filtered_copy = filtered_df.copy()
-filtered_copy['Hour_Category'] = filtered_copy['Hour'].apply(lambda x: f"{x.hour:02d}:00" if pd.notna(x) else "N/A")
-hours_df = create_performance_df(filtered_copy, 'Hour_Category', 'Hora')
-
-opponents_df = pd.DataFrame()
-if "Opponent" in df.columns:
-    opponents_df = create_performance_df(filtered_df, 'Opponent', 'Rival')
-
-# --- CREACIÓN DE TABS ---
-tab_titles = ["🎾 Jugadores", "📍 Lugares", "🕒 Temporal", "📊 Gráficos", "📋 Datos", "🔍 Estadísticas Avanzadas", "🎯 Nuevos Análisis", "📈 Dataframes"]
-tabs = st.tabs(tab_titles)
-
-with tabs[0]:
-    jugadores.render(filtered_df, teammates_df)
-
-with tabs[1]:
-    lugares.render(filtered_df, locations_df)
-
-with tabs[2]:
-    temporal.render(filtered_df)
-
-with tabs[3]:
-    graficos.render(filtered_df)
-
-with tabs[4]:
-    datos.render(filtered_df, teammates_df, locations_df, hours_df, opponents_df)
-
-with tabs[5]:
-    estadisticas.render(filtered_df)
-
-with tabs[6]:
-    nuevos_analisis.render(df, filtered_df, teammates_df, locations_df, hours_df)
-
-with tabs[7]:
-    dataframes_tab.render(df, teammates_df, locations_df, hours_df, opponents_df)
-
-
-# --- FOOTER ---
-st.markdown("---")
-st.markdown("*Dashboard creado para análisis avanzado de rendimiento en pádel* 🎾")
-st.markdown(f"*Última actualización: {datetime.now().strftime('%d/%m/%Y %H:%M')}*")
\ No newline at end of file
+
+    # --- APLICAR FILTROS ---
+    if len(date_range) < 2:  # Rango de fechas a medio seleccionar
+        date_range = [date_range[0], filter_options["Date"][1]] if date_range else filter_options["Date"]
+    filters = normalize_filters({
+        "year": year, "month": month, "weekday": weekday, "location": location, "teammate": teammate,
+        "result": result, "date_range": date_range, "opponent": opponent,
+        "source": source,
+    })
+    if st.session_state.get("_last_filters") != filters:
+        preset_registry.record(filters)
+        st.session_state["_last_filters"] = filters
+
+    # Datos filtrados y tablas de rendimiento, cacheados por datos + filtros (los presets se pre-calientan),
+    # y preparación de datos de las pestañas en paralelo (ver build_view_graph en views.py). Los datos
+    # base sólo se cargan si la vista no está en caché.
+    view = get_view(snapshot, load_for, filters, load_full)
+    filtered_df = view["filtered"]
+    # Momentos de las métricas para la selección: se fusionan los estados parciales precalculados
+    metric_moments = view["moments"]
+
+    # --- MÉTRICAS GLOBALES ---
+    st.subheader("📊 Resumen Global")
+    if not filtered_df.empty:
+        col1, col2, col3, col4, col5, col6, col7, col8, col9 = st.columns(9)
+        total_games = len(filtered_df)
+        wins = (filtered_df['Result'] == 'W').sum()
+        losses = (filtered_df['Result'] == 'L').sum()
+        win_rate = (wins / total_games * 100) if total_games > 0 else 0
+        win_rate_no_draws = (wins / (wins + losses) * 100) if (wins + losses) > 0 else 0
+
+        col1.metric("Partidos", total_games)
+        col2.metric("Victorias", wins)
+        col3.metric("Derrotas", losses)
+        col4.metric("% Victorias", f"{win_rate:.1f}%")
+        col5.metric("% Victorias (s/ emp)", f"{win_rate_no_draws:.1f}%")
+        metric_means = metric_moments.total().means()
+        col6.metric("Merit Avg", f"{metric_means['Merit']:.2f}")
+        col7.metric("Química Avg", f"{metric_means['Quimica']:.2f}")
+        col8.metric("Rendim. Avg", f"{metric_means['Rendiment']:.2f}")
+        col9.metric("Dif. Juegos Avg", f"{metric_means['Game-Diff']:.2f}")
+    else:
+        st.warning("No hay datos que coincidan con los filtros seleccionados.")
+        st.stop()
+
+
+    # --- PRE-CÁLCULO DE DATAFRAMES DE RENDIMIENTO ---
+    st.subheader("🎯 Análisis de Rendimiento Detallado")
+    teammates_df = view["teammates"]
+    locations_df = view["locations"]
+    hours_df = view["hours"]
+    opponents_df = view["opponents"]
+
+    # --- CREACIÓN DE TABS ---
+    tab_titles = ["🎾 Jugadores", "📍 Lugares", "🕒 Temporal", "📊 Gráficos", "📋 Datos", "🔍 Estadísticas Avanzadas", "🎯 Nuevos Análisis", "📈 Dataframes"]
+    tabs = st.tabs(tab_titles)
+
+    with tabs[0]:
+        jugadores.render(filtered_df, teammates_df, view["cumulative_teammates"])
+
+    with tabs[1]:
+        lugares.render(filtered_df, locations_df, view["cumulative_locations"])
+
+    with tabs[2]:
+        temporal.render(filtered_df, view["temporal"])
+
+    with tabs[3]:
+        graficos.render(filtered_df, metric_moments, view["correlations"])
+
+    with tabs[4]:
+        datos.render(filtered_df, teammates_df, locations_df, hours_df, opponents_df, view["sort_orders"])
+
+    with tabs[5]:
+        estadisticas.render(filtered_df, metric_moments, view["estadisticas"])
+
+    with tabs[6]:
+        nuevos_analisis.render(filter_options, filtered_df, teammates_df, locations_df, hours_df, metric_moments, view["insights"],
+                               get_model(snapshot, load_full))
+
+    with tabs[7]:
+        dataframes_tab.render(filter_options, teammates_df, locations_df, hours_df, opponents_df)
+
+
+    # --- FOOTER ---
+    st.markdown("---")
+    st.markdown("*Dashboard creado para análisis avanzado de rendimiento en pádel* 🎾")
+    st.markdown(f"*Última actualización: {datetime.now().strftime('%d/%m/%Y %H:%M')}*")
+
+    with st.expander("⏱️ Tiempos de preparación de la vista"):
+        timings = view["timings"]
+        st.caption(
+            f"Tiempo real {timings['wall_ms']:.0f} ms · suma secuencial {timings['sequential_ms']:.0f} ms · "
+            f"camino crítico {timings['critical_ms']:.0f} ms ({' → '.join(timings['critical_path'])})"
+        )
+        st.dataframe(timings["tasks"], use_container_width=True, hide_index=True)
+
+    with st.expander("🧠 Memoria"):
+        metrics = memory_manager.metrics()
+        if metrics["degraded"]:
+            st.warning("Memoria cerca del límite: se han vaciado las cachés secundarias y no se pre-calientan presets.")
+        st.caption(
+            f"Vistas en caché: {metrics['view_cache_entries']} ({metrics['view_cache_bytes'] / 2**20:.1f} MB de "
+            f"{metrics['memory_cap_bytes'] / 2**20:.0f} MB) · aciertos {metrics['view_cache_hits_total']} · "
+            f"fallos {metrics['view_cache_misses_total']} · desalojos {sum(metrics['evictions'].values())}"
+        )
+        st.dataframe(memory_manager.sessions(), use_container_width=True, hide_index=True)
+
+    # --- PRE-CALENTAMIENTO DE PRESETS ---
+    # Tras pintar la página, calcula en segundo plano las vistas populares aún no cacheadas para este snapshot
+    schedule_prewarm(snapshot, presets, load_for, load_full)
+finally:
+    memory_manager.end_rerun(sid)
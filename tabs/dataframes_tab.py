@@ -2,7 +2,14 @@
 import streamlit as st
 import pandas as pd
 
-def render(df, teammates_df, locations_df, hours_df, opponents_df):
+def ci_caption(performance_df):
+    """Remuestreos usados en los intervalos de confianza de la tabla."""
+    resamples = performance_df.attrs.get("IC_Remuestreos")
+    if resamples:
+        st.caption(f"Intervalos de confianza al 95% con {resamples} remuestreos"
+                   + (" (cortados por el límite de tiempo de seguridad)" if performance_df.attrs.get("IC_Corte") else ""))
+
+def render(options, teammates_df, locations_df, hours_df, opponents_df):
     st.subheader("Dataframes de Rendimiento Agregado")
     
     st.write("Aquí puedes ver las tablas de rendimiento agregado que se usan para los análisis. Los promedios y porcentajes se calculan sobre los datos filtrados.")
@@ -17,13 +24,18 @@ def render(df, teammates_df, locations_df, hours_df, opponents_df):
         'Merit_Avg': '{:.2f}',
         'Quimica_Avg': '{:.2f}',
         'Rendiment_Avg': '{:.2f}',
-        'GameDiff_Avg': '{:.2f}'
+        'GameDiff_Avg': '{:.2f}',
+        'Win_Rate_IC_Inf': '{:.1f}%',
+        'Win_Rate_IC_Sup': '{:.1f}%',
+        'Merit_IC_Inf': '{:.2f}',
+        'Merit_IC_Sup': '{:.2f}'
     }
 
     with tab_perf1:
         st.markdown("#### Rendimiento por Compañero")
         if not teammates_df.empty:
             st.dataframe(teammates_df.style.format(style_format), use_container_width=True)
+            ci_caption(teammates_df)
         else:
             st.info("No hay datos de rendimiento de compañeros para los filtros seleccionados.")
 
@@ -31,6 +43,7 @@ def render(df, teammates_df, locations_df, hours_df, opponents_df):
         st.markdown("#### Rendimiento por Lugar")
         if not locations_df.empty:
             st.dataframe(locations_df.style.format(style_format), use_container_width=True)
+            ci_caption(locations_df)
         else:
             st.info("No hay datos de rendimiento por lugar para los filtros seleccionados.")
 
@@ -38,12 +51,14 @@ def render(df, teammates_df, locations_df, hours_df, opponents_df):
         st.markdown("#### Rendimiento por Hora")
         if not hours_df.empty:
             st.dataframe(hours_df.style.format(style_format), use_container_width=True)
+            ci_caption(hours_df)
         else:
             st.info("No hay datos de rendimiento por hora para los filtros seleccionados.")
 
     with tab_perf4:
         st.markdown("#### Rendimiento por Rival")
-        if "Opponent" in df.columns and not opponents_df.empty:
+        if "Opponent" in options and not opponents_df.empty:
             st.dataframe(opponents_df.style.format(style_format), use_container_width=True)
+            ci_caption(opponents_df)
         else:
             st.info("No hay datos de rivales disponibles o no coinciden con los filtros.")
\ No newline at end of file
@@ -1,51 +1,54 @@
 # tabs/datos.py
+import io
 import streamlit as st
 import pandas as pd
 from datetime import datetime
+from pagination import paginated_table, search_mask, sort_permutations
 
-def render(filtered_df, teammates_df, locations_df, hours_df, opponents_df):
+def render(filtered_df, teammates_df, locations_df, hours_df, opponents_df, sort_orders=None):
     st.subheader("Datos Completos Filtrados")
     
     # Búsqueda en los datos
     search_term = st.text_input("Buscar en los datos:", "")
-    
-    display_df = filtered_df.copy()
-    if search_term:
-        mask = display_df.astype(str).apply(lambda x: x.str.contains(search_term, case=False, na=False)).any(axis=1)
-        display_df = display_df[mask]
-    
-    st.dataframe(
-        display_df.sort_values("Date", ascending=False).reset_index(drop=True), 
-        use_container_width=True
-    )
+    mask = search_mask(filtered_df, search_term) if search_term else None
+
+    # Tabla paginada: sólo se envía al navegador la página visible con las columnas elegidas
+    if sort_orders is None:
+        sort_orders = sort_permutations(filtered_df)
+    paginated_table(filtered_df, sort_orders, key="datos_table", default_sort="Date", mask=mask)
+    display_df = filtered_df[mask] if mask is not None else filtered_df
     
     # Opciones de exportación
     st.subheader("Opciones de Exportación")
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        csv = display_df.to_csv(index=False).encode('utf-8')
+        # Los ficheros sólo se generan cuando se pulsa el botón de descarga
+        def build_csv():
+            return display_df.to_csv(index=False).encode('utf-8')
+
         st.download_button(
             label="📥 Descargar Datos Filtrados (CSV)",
-            data=csv,
+            data=build_csv,
             file_name=f"padel_data_{datetime.now().strftime('%Y%m%d')}.csv",
             mime="text/csv"
         )
     
     with col2:
-        # Exportar resúmenes de rendimiento
-        output = pd.ExcelWriter('rendimiento_padel.xlsx', engine='xlsxwriter')
-        teammates_df.to_excel(output, sheet_name='Compañeros', index=False)
-        locations_df.to_excel(output, sheet_name='Lugares', index=False)
-        hours_df.to_excel(output, sheet_name='Horas', index=False)
-        if not opponents_df.empty:
-            opponents_df.to_excel(output, sheet_name='Rivales', index=False)
-        output.close()
-        
-        with open('rendimiento_padel.xlsx', 'rb') as f:
-            st.download_button(
-                label="📊 Descargar Análisis de Rendimiento (Excel)",
-                data=f,
-                file_name=f"padel_analysis_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                mime="application/vnd.ms-excel"
-            )
\ No newline at end of file
+        # Exportar resúmenes de rendimiento (xlsxwriter se importa al generar el fichero)
+        def build_excel():
+            output = io.BytesIO()
+            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+                teammates_df.to_excel(writer, sheet_name='Compañeros', index=False)
+                locations_df.to_excel(writer, sheet_name='Lugares', index=False)
+                hours_df.to_excel(writer, sheet_name='Horas', index=False)
+                if not opponents_df.empty:
+                    opponents_df.to_excel(writer, sheet_name='Rivales', index=False)
+            return output.getvalue()
+
+        st.download_button(
+            label="📊 Descargar Análisis de Rendimiento (Excel)",
+            data=build_excel,
+            file_name=f"padel_analysis_{datetime.now().strftime('%Y%m%d')}.xlsx",
+            mime="application/vnd.ms-excel"
+        )
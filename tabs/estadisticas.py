@@ -1,10 +1,30 @@
 # tabs/estadisticas.py
 import streamlit as st
 import numpy as np
-import pandas as pd
 from utils import calculate_all_streaks
+from aggregations import Aggregation, aggregate, count, mean, rate
 
-def render(filtered_df):
+# Tablas agregadas de la pestaña (se resuelven junto a las del resto de pestañas, ver aggregations.py)
+AGGREGATIONS = {
+    "estadisticas_time_of_day": Aggregation(["TimeOfDay"], {
+        "Partidos": count(), "WinRate": rate("Win"),
+        "Merit": mean("Merit"), "Quimica": mean("Quimica"), "Rendiment": mean("Rendiment"),
+    }),
+}
+
+def prepare_data(filtered_df, aggregates=None):
+    """
+    Rachas y rendimiento por momento del día.
+    `aggregates` son las tablas de `AGGREGATIONS` ya resueltas.
+    """
+    win_streaks, loss_streaks = calculate_all_streaks(filtered_df)
+
+    aggregates = aggregates if aggregates is not None else aggregate(filtered_df, AGGREGATIONS)
+    time_analysis = aggregates["estadisticas_time_of_day"].round(2).sort_values("Partidos", ascending=False)
+
+    return {"win_streaks": win_streaks, "loss_streaks": loss_streaks, "time_analysis": time_analysis}
+
+def render(filtered_df, metric_moments, prepared=None):
     st.subheader("Estadísticas Avanzadas")
 
     if filtered_df.empty:
@@ -13,7 +33,9 @@ def render(filtered_df):
 
     # --- Análisis de Rachas ---
     st.markdown("##### Análisis de Rachas")
-    win_streaks, loss_streaks = calculate_all_streaks(filtered_df)
+    if prepared is None:
+        prepared = prepare_data(filtered_df)
+    win_streaks, loss_streaks = prepared["win_streaks"], prepared["loss_streaks"]
     
     col1, col2, col3, col4 = st.columns(4)
     with col1:
@@ -33,26 +55,7 @@ def render(filtered_df):
 
     # --- Rendimiento por Momento del Día ---
     st.markdown("##### Rendimiento por Momento del Día")
-    temp_df = filtered_df.copy()
-    
-    def get_time_of_day(hour_obj):
-        if pd.isna(hour_obj):
-            return "No especificado"
-        hour = hour_obj.hour
-        if 5 <= hour < 12: return "Mañana"
-        if 12 <= hour < 17: return "Mediodía"
-        if 17 <= hour < 21: return "Tarde"
-        return "Noche"
-
-    temp_df["TimeOfDay"] = temp_df["Hour"].apply(get_time_of_day)
-    
-    time_analysis = temp_df.groupby("TimeOfDay").agg(
-        Partidos=("Result", "count"),
-        WinRate=("Result", lambda x: (x == "W").mean() * 100),
-        Merit=("Merit", "mean"),
-        Quimica=("Quimica", "mean"),
-        Rendiment=("Rendiment", "mean")
-    ).round(2).sort_values("Partidos", ascending=False)
+    time_analysis = prepared["time_analysis"]
     
     st.dataframe(time_analysis.style.format({
         "WinRate": "{:.1f}%", "Merit": "{:.2f}", "Quimica": "{:.2f}", "Rendiment": "{:.2f}"
@@ -62,7 +65,7 @@ def render(filtered_df):
 
     # --- Consistencia de Rendimiento ---
     st.markdown("##### Consistencia de Rendimiento (Desviación Estándar)")
-    consistency_metrics = filtered_df[["Merit", "Quimica", "Rendiment"]].std()
+    consistency_metrics = metric_moments.total().std()
     
     col1, col2, col3 = st.columns(3)
     col1.metric("Desv. Merit", f"{consistency_metrics.get('Merit', 0):.2f}", help="Menor valor = más consistente")
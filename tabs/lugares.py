@@ -1,10 +1,11 @@
 # tabs/lugares.py
 import streamlit as st
-import altair as alt
-import pandas as pd
-import numpy as np
+from charts import render_chart
+from utils import cumulative_merit_frame
+
+def render(filtered_df, locations_df, cumulative_df=None):
+    import altair as alt
 
-def render(filtered_df, locations_df):
     st.subheader("Análisis de Rendimiento por Lugar")
 
     if locations_df.empty:
@@ -15,29 +16,31 @@ def render(filtered_df, locations_df):
     st.markdown("#### Probabilidad de Victoria")
     st.write("Calcula una probabilidad de victoria ponderada para cada lugar, considerando múltiples factores de tu rendimiento.")
     
-    location_prob_chart = alt.Chart(locations_df).mark_bar().encode(
-        x=alt.X("Lugar:N", sort="-y", title="Lugar"),
-        y=alt.Y("Probabilidad_Victoria:Q", title="Probabilidad de Victoria (%)", scale=alt.Scale(domain=[0, 100])),
-        color=alt.Color("Probabilidad_Victoria:Q", scale=alt.Scale(scheme="redyellowgreen"), legend=alt.Legend(title="Probabilidad")),
-        tooltip=["Lugar", "Probabilidad_Victoria", "Total_Partidos", "Win_Rate_Sin_Empates", "Merit_Avg"]
-    ).properties(title="Probabilidad de Victoria por Lugar")
-    st.altair_chart(location_prob_chart, use_container_width=True)
+    def location_prob_chart(data):
+        return alt.Chart(data).mark_bar().encode(
+            x=alt.X("Lugar:N", sort="-y", title="Lugar"),
+            y=alt.Y("Probabilidad_Victoria:Q", title="Probabilidad de Victoria (%)", scale=alt.Scale(domain=[0, 100])),
+            color=alt.Color("Probabilidad_Victoria:Q", scale=alt.Scale(scheme="redyellowgreen"), legend=alt.Legend(title="Probabilidad")),
+            tooltip=["Lugar", "Probabilidad_Victoria", "Total_Partidos", "Win_Rate_Sin_Empates", "Merit_Avg"]
+        ).properties(title="Probabilidad de Victoria por Lugar")
+    render_chart("lugares_location_prob_chart", locations_df, location_prob_chart)
     st.divider()
 
     # --- Gráfico 2: Cluster de Rendimiento ---
     st.markdown("#### Cluster de Rendimiento")
     st.write("Compara el Merit y Rendimiento promedio en cada lugar. El tamaño del punto indica el número de partidos jugados.")
 
-    location_metrics = alt.Chart(locations_df).mark_point(size=150, filled=True, opacity=0.8).encode(
-        x=alt.X("Merit_Avg:Q", title="Merit Promedio"),
-        y=alt.Y("Rendiment_Avg:Q", title="Rendimiento Promedio"),
-        color=alt.Color("Probabilidad_Victoria:Q", scale=alt.Scale(scheme="redyellowgreen"), title="Prob. Victoria"),
-        size=alt.Size("Total_Partidos:Q", scale=alt.Scale(range=[100, 500]), title="Partidos Jugados"),
-        tooltip=["Lugar", "Merit_Avg", "Rendiment_Avg", "Probabilidad_Victoria", "Total_Partidos"]
-    ).properties(
-        title="Métricas de Rendimiento por Lugar"
-    ).interactive()
-    st.altair_chart(location_metrics, use_container_width=True)
+    def location_metrics(data):
+        return alt.Chart(data).mark_point(size=150, filled=True, opacity=0.8).encode(
+            x=alt.X("Merit_Avg:Q", title="Merit Promedio"),
+            y=alt.Y("Rendiment_Avg:Q", title="Rendimiento Promedio"),
+            color=alt.Color("Probabilidad_Victoria:Q", scale=alt.Scale(scheme="redyellowgreen"), title="Prob. Victoria"),
+            size=alt.Size("Total_Partidos:Q", scale=alt.Scale(range=[100, 500]), title="Partidos Jugados"),
+            tooltip=["Lugar", "Merit_Avg", "Rendiment_Avg", "Probabilidad_Victoria", "Total_Partidos"]
+        ).properties(
+            title="Métricas de Rendimiento por Lugar"
+        ).interactive()
+    render_chart("lugares_location_metrics", locations_df, location_metrics)
     st.divider()
 
     # --- Gráfico 3: Evolución de Merit Acumulado por Lugar (corregido con relleno de ceros) ---
@@ -45,43 +48,25 @@ def render(filtered_df, locations_df):
     st.write("Muestra cómo ha evolucionado tu aporte neto (Merit) en tus 5 canchas más frecuentes. La línea se mantiene plana en los días sin partido.")
 
     if "Location" in filtered_df.columns and not filtered_df.empty:
-        # Obtener los 5 lugares más frecuentes
-        top_locations = filtered_df['Location'].value_counts().nlargest(5).index
-        df_top = filtered_df[filtered_df['Location'].isin(top_locations)].copy()
-
-        # Asegurar que Date es datetime
-        df_top['Date'] = pd.to_datetime(df_top['Date'])
-
-        # Crear un MultiIndex con todas las combinaciones de fechas y lugares
-        date_range = pd.date_range(start=df_top['Date'].min(), end=df_top['Date'].max(), freq='D')
-        multi_index = pd.MultiIndex.from_product([top_locations, date_range], names=['Location', 'Date'])
-
-        # Sumar Merit diario por lugar
-        df_played = df_top.groupby(['Location', 'Date'])['Merit'].sum().reset_index()
-
-        # Completar días sin partidos con mérito = 0
-        df_full = df_played.set_index(['Location', 'Date']).reindex(multi_index, fill_value=0).reset_index()
-
-        # Calcular acumulado y preparar tooltip limpio
-        df_full['Merit_Cumsum'] = df_full.groupby('Location')['Merit'].cumsum()
-        df_full['Tooltip_Merit'] = df_full['Merit'].replace(0, np.nan)
+        df_full = cumulative_df if cumulative_df is not None else cumulative_merit_frame(filtered_df, 'Location')
 
         # Gráfico
-        line_chart = alt.Chart(df_full).mark_line().encode(
-            x=alt.X('Date:T', title='Fecha'),
-            y=alt.Y('Merit_Cumsum:Q', title='Merit Acumulado'),
-            color=alt.Color('Location:N', title='Lugar'),
-            tooltip=[
-                alt.Tooltip('Date:T', title='Fecha'),
-                alt.Tooltip('Location:N', title='Lugar'),
-                alt.Tooltip('Merit_Cumsum:Q', title='Merit Acumulado'),
-                alt.Tooltip('Tooltip_Merit:Q', title='Merit de este Partido (si se jugó)')
-            ]
-        ).properties(
-            title="Evolución de Merit Acumulado en Lugares Frecuentes"
-        ).interactive()
-
-        st.altair_chart(line_chart, use_container_width=True)
+        def line_chart(data):
+            return alt.Chart(data).mark_line().encode(
+                x=alt.X('Date:T', title='Fecha'),
+                y=alt.Y('Merit_Cumsum:Q', title='Merit Acumulado'),
+                color=alt.Color('Location:N', title='Lugar'),
+                tooltip=[
+                    alt.Tooltip('Date:T', title='Fecha'),
+                    alt.Tooltip('Location:N', title='Lugar'),
+                    alt.Tooltip('Merit_Cumsum:Q', title='Merit Acumulado'),
+                    alt.Tooltip('Tooltip_Merit:Q', title='Merit de este Partido (si se jugó)')
+                ]
+            ).properties(
+                title="Evolución de Merit Acumulado en Lugares Frecuentes"
+            ).interactive()
+
+        render_chart("lugares_line_chart", df_full, line_chart)
 
 
     # --- NUEVA SECCIÓN: Racha de los últimos 6 partidos ---
@@ -94,6 +79,8 @@ def render(filtered_df, locations_df):
             rows = [top_places_streak[:3], top_places_streak[3:]]
             
             for row in rows:
+                if not row:
+                    continue
                 cols = st.columns(len(row))
                 for i, place in enumerate(row):
                     with cols[i]:
@@ -1,9 +1,13 @@
 # tabs/nuevos_analisis.py
+import time
 import streamlit as st
 import pandas as pd
-import altair as alt
+from insights import mine_insights, HOUR_BUCKETS
+from prediction import get_model
 
-def render(df, filtered_df, teammates_df, locations_df, hours_df):
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+def render(options, filtered_df, teammates_df, locations_df, hours_df, metric_moments, mined=None, model=None):
     st.subheader("🎯 Insights Clave y Análisis Adicionales")
 
     if filtered_df.empty:
@@ -12,10 +16,10 @@ def render(df, filtered_df, teammates_df, locations_df, hours_df):
 
     # --- Factores de Éxito ---
     st.markdown("##### Diferencias Clave entre Victorias y Derrotas")
-    success_factors = filtered_df.groupby("Result")[["Merit", "Quimica", "Rendiment", "Game-Diff"]].mean()
+    success_factors = metric_moments.by("Result")
     
-    if "W" in success_factors.index and "L" in success_factors.index:
-        success_diff = success_factors.loc["W"] - success_factors.loc["L"]
+    if "W" in success_factors and "L" in success_factors:
+        success_diff = success_factors["W"].means() - success_factors["L"].means()
         
         col1, col2, col3, col4 = st.columns(4)
         col1.metric("∆ Merit", f"+{success_diff.get('Merit', 0):.2f}")
@@ -64,4 +68,63 @@ def render(df, filtered_df, teammates_df, locations_df, hours_df):
             insights.append(f"🕒 La hora a la que mejor rindes es **{best_hour['Hora']}** con una probabilidad de victoria del **{best_hour['Probabilidad_Victoria']:.1f}%**.")
 
     for insight in insights:
-        st.success(insight)
\ No newline at end of file
+        st.success(insight)
+
+    st.divider()
+
+    # --- Combinaciones Destacadas ---
+    st.markdown("##### 🔎 Combinaciones Destacadas")
+    st.write("Combinaciones de 2 y 3 factores (compañero, lugar, rival, franja horaria y día) en las que tu % de victorias o tu Merit medio se alejan claramente de tu media.")
+    if mined is None:
+        mined = mine_insights(filtered_df)
+    segments = mined["insights"]
+    if segments.empty:
+        st.write("No se han encontrado combinaciones con suficientes partidos que se desvíen de tu media.")
+    else:
+        for _, row in segments.head(3).iterrows():
+            # El signo lo marca la desviación más significativa (victorias o Merit)
+            z = row["z_WinRate"] if abs(row["z_WinRate"]) >= abs(row["z_Merit"]) else row["z_Merit"]
+            if z > 0:
+                st.success(f"📈 **{row['Segmento']}**: {row['WinRate']:.1f}% de victorias y Merit medio {row['Merit_Avg']:.2f} en {row['Partidos']} partidos.")
+            else:
+                st.warning(f"📉 **{row['Segmento']}**: {row['WinRate']:.1f}% de victorias y Merit medio {row['Merit_Avg']:.2f} en {row['Partidos']} partidos.")
+        st.dataframe(segments, use_container_width=True, hide_index=True)
+    baseline = mined["baseline"]
+    st.caption(
+        f"Media de referencia: {baseline['WinRate']:.1f}% de victorias, Merit {baseline['Merit']:.2f} "
+        f"({baseline['Partidos']} partidos) · {mined['evaluated']} segmentos evaluados, "
+        "con una tasa de falsos descubrimientos del 5% (Benjamini-Hochberg)"
+        + ("" if mined["complete"] else " · búsqueda cortada por tiempo")
+    )
+
+    st.divider()
+
+    # --- Planificador del Próximo Partido ---
+    st.markdown("##### 🗓️ Planifica tu Próximo Partido")
+    st.write("Probabilidad de victoria estimada por un modelo logístico entrenado con todo tu historial. Elige las opciones posibles y se puntúan todas sus combinaciones.")
+    if model is None:
+        model = get_model(None, lambda: filtered_df)
+    # Opciones de todo el historial (las de los filtros de la barra lateral), no sólo de los años cargados
+    frequent = options.get("Frecuentes", {})
+    col1, col2, col3, col4 = st.columns(4)
+    plan_options = {
+        "Teammate": col1.multiselect("Compañeros", options["Teammate"],
+                                     default=frequent.get("Teammate", options["Teammate"])[:5], key="plan_teammates"),
+        "Location": col2.multiselect("Lugares", options["Location"],
+                                     default=frequent.get("Location", options["Location"])[:3], key="plan_locations"),
+        "Franja": col3.multiselect("Franja horaria", HOUR_BUCKETS, default=HOUR_BUCKETS, key="plan_hours"),
+        "Weekday": col4.multiselect("Día", WEEKDAYS, default=WEEKDAYS, key="plan_weekdays"),
+    }
+    if "Opponent" in options:
+        plan_options["Opponent"] = st.multiselect("Rivales (vacío = cualquiera)", options["Opponent"],
+                                                  key="plan_opponents")
+
+    start = time.perf_counter()
+    plan, evaluated = model.plan(plan_options, top_k=10)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    plan = plan.rename(columns={"Teammate": "Compañero", "Location": "Lugar", "Opponent": "Rival", "Weekday": "Día"})
+    st.dataframe(plan.style.format({"Probabilidad_Victoria": "{:.1f}%"}), use_container_width=True, hide_index=True)
+    st.caption(
+        f"{evaluated} combinaciones puntuadas en {elapsed_ms:.1f} ms · modelo entrenado con {model.info['Partidos']} partidos "
+        f"(log-loss {model.info['LogLoss']:.3f}, acierto {model.info['Acierto'] * 100:.0f}%)"
+    )
@@ -0,0 +1,132 @@
+# taskgraph.py
+"""
+Ejecutor mínimo de grafos de tareas sobre un pool de hilos.
+
+Cada tarea declara de qué tareas depende y recibe sus resultados como argumentos. Las tareas
+independientes se ejecutan a la vez (pandas y NumPy liberan el GIL en buena parte de su trabajo),
+así que el tiempo total se acerca al del camino crítico y no a la suma de todas las tareas.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import pandas as pd
+
+MAX_WORKERS = min(8, (os.cpu_count() or 1) + 2)
+
+_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="taskgraph")
+
+try:  # Atributo interno de Streamlit con el contexto del hilo (para poder quitarlo, no hay API pública)
+    from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+except ImportError:
+    SCRIPT_RUN_CONTEXT_ATTR_NAME = "streamlit_script_run_ctx"
+
+
+def _script_ctx():
+    """Contexto de la ejecución de Streamlit actual (si lo hay) para propagarlo a los hilos."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        return get_script_run_ctx(suppress_warning=True)
+    except ImportError:
+        return None
+
+
+def _set_script_ctx(ctx):
+    """Asigna (o quita, con None) el contexto de Streamlit del hilo actual."""
+    thread = threading.current_thread()
+    if ctx is None:
+        vars(thread).pop(SCRIPT_RUN_CONTEXT_ATTR_NAME, None)
+    else:
+        from streamlit.runtime.scriptrunner import add_script_run_ctx
+        add_script_run_ctx(thread, ctx)
+
+
+class TaskGraph:
+    """Grafo de tareas: `add(nombre, fn, deps)` y después `run()`."""
+
+    def __init__(self):
+        self.tasks = {}
+        self.timings = {}
+        self.wall_ms = 0.0
+
+    def add(self, name, fn, deps=()):
+        """Añade una tarea; `fn(*resultados_de_deps)` se llama cuando terminan sus dependencias."""
+        missing = [d for d in deps if d not in self.tasks]
+        if missing:
+            raise ValueError(f"La tarea '{name}' depende de tareas no definidas: {missing}")
+        self.tasks[name] = (fn, tuple(deps))
+        return self
+
+    def _call(self, name, ctx, args):
+        # Los hilos del pool son compartidos: el contexto de la sesión sólo vale durante esta tarea
+        previous = _script_ctx()
+        _set_script_ctx(ctx)
+        start = time.perf_counter()
+        try:
+            return self.tasks[name][0](*args)
+        finally:
+            self.timings[name] = (start, time.perf_counter())
+            _set_script_ctx(previous)
+
+    def run(self, executor=None):
+        """Ejecuta el grafo y devuelve `{nombre: resultado}`. Los errores de una tarea se propagan."""
+        executor = executor or _pool
+        ctx = _script_ctx()
+        results, running = {}, {}
+        pending = dict(self.tasks)
+        self.timings = {}
+        t0 = time.perf_counter()
+
+        while pending or running:
+            ready = [name for name, (_, deps) in pending.items() if all(d in results for d in deps)]
+            for name in ready:
+                deps = pending.pop(name)[1]
+                running[executor.submit(self._call, name, ctx, [results[d] for d in deps])] = name
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+
+        self.wall_ms = (time.perf_counter() - t0) * 1000
+        self._t0 = t0
+        return results
+
+    def critical_path(self):
+        """Cadena de dependencias con mayor duración acumulada: `(nombres, ms)`."""
+        best = {}
+        for name in self._topological_order():
+            deps = self.tasks[name][1]
+            prev = max((best[d] for d in deps), key=lambda b: b[1], default=([], 0.0))
+            start, end = self.timings[name]
+            best[name] = (prev[0] + [name], prev[1] + (end - start) * 1000)
+        return max(best.values(), key=lambda b: b[1], default=([], 0.0))
+
+    def _topological_order(self):
+        order, seen = [], set()
+
+        def visit(name):
+            if name not in seen:
+                seen.add(name)
+                for dep in self.tasks[name][1]:
+                    visit(dep)
+                order.append(name)
+
+        for name in self.tasks:
+            visit(name)
+        return order
+
+    def report(self):
+        """Resumen de la última ejecución: tiempos por tarea, camino crítico, suma secuencial y tiempo real."""
+        path, path_ms = self.critical_path()
+        tasks = pd.DataFrame([
+            {"Tarea": name, "Inicio_ms": (start - self._t0) * 1000, "Duración_ms": (end - start) * 1000,
+             "Crítica": name in path}
+            for name, (start, end) in self.timings.items()
+        ]).sort_values("Inicio_ms").round(1).reset_index(drop=True)
+        return {
+            "tasks": tasks,
+            "critical_path": path,
+            "critical_ms": path_ms,
+            "sequential_ms": float(tasks["Duración_ms"].sum()),
+            "wall_ms": self.wall_ms,
+        }
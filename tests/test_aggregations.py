@@ -0,0 +1,142 @@
+# tests/test_aggregations.py
+"""
+Regresión del plan de agregaciones (aggregations.py) frente a los `groupby` con lambdas por fila que
+sustituyó en las pestañas Temporal y Estadísticas, en las tablas de rendimiento y en la franja horaria.
+"""
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from aggregations import AggregationPlan, aggregate, performance_spec
+from tabs import estadisticas, temporal
+from views import _hour_frame
+
+
+
+@pytest.fixture
+def matches():
+    rng = np.random.default_rng(7)
+    n = 400
+    hours = [f"{h:02d}:{m:02d}" for h, m in zip(rng.integers(0, 24, n), rng.integers(0, 60, n))]
+    hours = [h if i % 9 else None for i, h in enumerate(hours)]  # Algunos partidos sin hora
+    df = pd.DataFrame({
+        "Date": pd.Timestamp("2022-01-01") + pd.to_timedelta(rng.integers(0, 900, n), unit="D"),
+        "Hour": pd.to_datetime(pd.Series(hours), format="%H:%M", errors="coerce").dt.time,
+        "Result": rng.choice(["W", "L", "N"], n, p=[0.5, 0.4, 0.1]),
+        "Teammate": rng.choice(["Ana", "Berta", "Carla", "Dani"], n),
+        "Location": rng.choice(["Club A", "Club B", "Club C"], n),
+        "Opponent": rng.choice(["Rival 1", "Rival 2", "Rival 3", None], n),  # Algunos partidos sin rival
+        "Merit": rng.normal(0, 1, n).round(2),
+        "Quimica": rng.normal(5, 2, n).round(2),
+        "Rendiment": rng.normal(5, 2, n).round(2),
+        "Game-Diff": rng.integers(-6, 7, n).astype(float),
+    })
+    df.loc[::13, "Merit"] = np.nan
+    df["Year"] = df["Date"].dt.year
+    df["Month"] = df["Date"].dt.month_name()
+    df["Weekday"] = df["Date"].dt.day_name()
+    return df
+
+
+# --- Implementaciones anteriores (lambdas por fila) ---
+def _old_time_of_day(hour_obj):
+    if pd.isna(hour_obj):
+        return "No especificado"
+    hour = hour_obj.hour
+    if 5 <= hour < 12: return "Mañana"
+    if 12 <= hour < 17: return "Mediodía"
+    if 17 <= hour < 21: return "Tarde"
+    return "Noche"
+
+
+def _old_time_of_day_labelled(hour_obj):
+    if pd.isna(hour_obj): return "No especificado"
+    h = hour_obj.hour
+    if 5 <= h <= 11: return "Mañana (5-11)"
+    if 12 <= h <= 16: return "Mediodía (12-16)"
+    if 17 <= h <= 20: return "Tarde (17-20)"
+    return "Noche (21-4)"
+
+
+def _old_season(month_name):
+    if month_name in ["December", "January", "February"]: return "Invierno"
+    if month_name in ["March", "April", "May"]: return "Primavera"
+    if month_name in ["June", "July", "August"]: return "Verano"
+    if month_name in ["September", "October", "November"]: return "Otoño"
+    return "Desconocido"
+
+
+def _old_hour_category(df):
+    return df["Hour"].apply(lambda x: f"{x.hour:02d}:00" if pd.notna(x) else "N/A")
+
+
+def _old_performance(df, group_col):
+    performance = df.groupby(group_col).agg({
+        'Result': ['count', lambda x: (x == 'W').sum()],
+        'Merit': 'mean',
+        'Quimica': 'mean',
+        'Rendiment': 'mean',
+        'Game-Diff': 'mean'
+    })
+    performance.columns = ['Total_Partidos', 'Victorias', 'Merit_Avg', 'Quimica_Avg', 'Rendiment_Avg', 'GameDiff_Avg']
+    performance['Win_Rate_Sin_Empates'] = performance['Victorias'] / df.groupby(group_col)['Result'].apply(lambda x: (x != 'N').sum()) * 100
+    return performance
+
+
+def test_hour_category_matches_previous_lambda(matches):
+    plan = AggregationPlan(matches)
+    expected = _old_hour_category(matches)
+    assert list(plan.column("Hour_Category")) == list(expected)
+    pdt.assert_series_equal(_hour_frame(matches, plan)["Hour_Category"], expected, check_names=False)
+
+
+@pytest.mark.parametrize("group_col", ["Teammate", "Location", "Hour_Category", "Opponent"])
+def test_performance_matches_previous_groupby(matches, group_col):
+    df = matches.assign(Hour_Category=_old_hour_category(matches))
+    result = aggregate(matches, {"p": performance_spec(group_col)})["p"]
+    pdt.assert_frame_equal(result, _old_performance(df, group_col), check_dtype=False, check_names=False)
+
+
+def test_estadisticas_matches_previous_groupby(matches):
+    df = matches.assign(TimeOfDay=matches["Hour"].apply(_old_time_of_day))
+    expected = df.groupby("TimeOfDay").agg(
+        Partidos=("Result", "count"),
+        WinRate=("Result", lambda x: (x == "W").mean() * 100),
+        Merit=("Merit", "mean"),
+        Quimica=("Quimica", "mean"),
+        Rendiment=("Rendiment", "mean")
+    )
+    result = aggregate(matches, estadisticas.AGGREGATIONS)["estadisticas_time_of_day"]
+    pdt.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_temporal_matches_previous_groupby(matches):
+    daily = matches.assign(TimeOfDay=matches["Hour"].apply(_old_time_of_day_labelled)).groupby(["Weekday", "TimeOfDay"]).agg(
+        Partidos=("Result", "count"),
+        WinRate=("Result", lambda x: (x == 'W').mean() * 100),
+        Merit_Avg=("Merit", "mean")
+    )
+    seasonal = matches.assign(Season=matches["Month"].apply(_old_season)).groupby(["Year", "Season"]).agg(
+        Partidos=("Result", "count"),
+        WinRate=("Result", lambda x: (x == 'W').mean() * 100)
+    )
+    result = aggregate(matches, temporal.AGGREGATIONS)
+    pdt.assert_frame_equal(result["temporal_daily"], daily, check_dtype=False)
+    pdt.assert_frame_equal(result["temporal_seasonal"], seasonal, check_dtype=False)
+
+
+def test_shared_plan_matches_separate_plans(matches):
+    specs = {**temporal.AGGREGATIONS, **estadisticas.AGGREGATIONS,
+             **{f"performance_{c}": performance_spec(c) for c in ["Teammate", "Location", "Hour_Category", "Opponent"]}}
+    shared = aggregate(matches, specs)
+    for name, spec in specs.items():
+        pdt.assert_frame_equal(shared[name], aggregate(matches, {name: spec})[name])
+
+
+def test_group_keys_without_values_are_dropped(matches):
+    # Como groupby: las filas sin rival no forman grupo; una columna sin ningún valor da una tabla vacía
+    opponents = aggregate(matches, {"p": performance_spec("Opponent")})["p"]
+    assert opponents["Total_Partidos"].sum() == matches["Opponent"].notna().sum()
+    empty = aggregate(matches.assign(Opponent=None), {"p": performance_spec("Opponent")})["p"]
+    assert empty.empty
@@ -0,0 +1,55 @@
+# tests/test_export_static.py
+"""Exportación estática (export_static.py): huella por vista y página sin HTML de los datos."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from export_static import INDEX_HTML, view_fingerprint
+from utils import build_filter_options
+
+
+@pytest.fixture
+def matches():
+    rng = np.random.default_rng(5)
+    n = 200
+    dates = pd.Timestamp("2023-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 2 * 365, n)), unit="D")
+    hours = [f"{h:02d}:00" for h in rng.integers(8, 23, n)]
+    return pd.DataFrame({
+        "Date": dates,
+        "Hour": pd.to_datetime(pd.Series(hours), format="%H:%M").dt.time,
+        "Year": dates.year,
+        "Month": dates.month_name(),
+        "Weekday": dates.day_name(),
+        "Location": rng.choice(["Club A", "Club B"], n),
+        "Teammate": rng.choice(["Ana", "Berta", "Carla"], n),
+        "Opponent": rng.choice(["Rival 1", "Rival 2"], n),
+        "Result": rng.choice(["W", "L", "N"], n),
+        "Merit": rng.normal(0, 1, n),
+    })
+
+
+def _fingerprints(df, presets):
+    options = build_filter_options(df)
+    return [view_fingerprint(df, options, filters) for filters in presets]
+
+
+def test_view_fingerprint_follows_its_own_rows(matches):
+    presets = [{}, {"year_filter": [2023]}, {"location_filter": ["Club B"], "date_range": ["2024-01-01", "2024-06-30"]}]
+    before = _fingerprints(matches, presets)
+    assert len(set(before)) == 3 and before == _fingerprints(matches, presets)
+
+    # Un partido nuevo en 2024 en el Club A sólo cambia la vista por defecto
+    extra = matches.iloc[[-1]].assign(Location="Club A")
+    appended = pd.concat([matches, extra], ignore_index=True)
+    after = _fingerprints(appended, presets)
+    assert [a != b for a, b in zip(before, after)] == [True, False, False]
+
+    # Cambiar un resultado de 2023 cambia también la vista de 2023
+    edited = matches.copy()
+    edited.loc[0, "Result"] = "W" if edited.loc[0, "Result"] != "W" else "L"
+    assert [a != b for a, b in zip(before, _fingerprints(edited, presets))][:2] == [True, True]
+
+
+def test_index_page_never_renders_data_as_html():
+    assert "innerHTML" not in INDEX_HTML
+    assert "textContent" in INDEX_HTML
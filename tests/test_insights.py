@@ -0,0 +1,55 @@
+# tests/test_insights.py
+"""Búsqueda de segmentos destacados (insights.py): tests exactos y control de falsos descubrimientos."""
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from insights import binomial_pvalues, mine_insights
+
+
+def _matches(n, seed):
+    """Partidos en que ningún factor influye en el resultado ni en el Merit."""
+    rng = np.random.default_rng(seed)
+    hours = [f"{h:02d}:00" for h in rng.integers(8, 23, n)]
+    return pd.DataFrame({
+        "Hour": pd.to_datetime(pd.Series(hours), format="%H:%M").dt.time,
+        "Teammate": rng.choice([f"Jugador {i}" for i in range(12)], n),
+        "Location": rng.choice(["Club A", "Club B", "Club C", "Club D"], n),
+        "Opponent": rng.choice([f"Rival {i}" for i in range(20)], n),
+        "Weekday": rng.choice(["Monday", "Wednesday", "Friday", "Sunday"], n),
+        "Result": rng.choice(["W", "L", "N"], n, p=[0.5, 0.4, 0.1]),
+        "Merit": rng.normal(0, 1, n).round(2),
+    })
+
+
+def test_binomial_pvalues_match_exact_sum():
+    k, n, p0 = np.array([0, 3, 5, 2, 50]), np.array([5, 10, 5, 40, 60]), 0.45
+    log_fact = np.concatenate(([0.0], np.cumsum(np.log(np.arange(1, 61)))))
+    expected = []
+    for ki, ni in zip(k, n):
+        pmf = [math.comb(ni, j) * p0 ** j * (1 - p0) ** (ni - j) for j in range(ni + 1)]
+        expected.append(min(1.0, sum(x for x in pmf if x <= pmf[ki] * (1 + 1e-7))))
+    np.testing.assert_allclose(binomial_pvalues(k, n, p0, log_fact), expected, rtol=1e-9)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_null_dataset_yields_no_insights(seed):
+    mined = mine_insights(_matches(3000, seed), budget_s=10)
+    assert mined["complete"] and mined["evaluated"] > 1000
+    assert mined["insights"].empty
+
+
+def test_planted_segment_is_found():
+    df = _matches(3000, 0)
+    planted = (df["Teammate"] == "Jugador 0") & (df["Location"] == "Club A")
+    df.loc[planted & (df["Result"] != "N"), "Result"] = "W"
+    insights = mine_insights(df, budget_s=10)["insights"]
+    assert insights.loc[0, "Segmento"] == "Compañero: Jugador 0 · Lugar: Club A"
+    assert (insights["p_valor"] <= 0.05).all()
+
+
+def test_dimension_without_values_is_ignored():
+    mined = mine_insights(_matches(500, 0).assign(Opponent=None), budget_s=10)
+    assert not mined["insights"]["Segmento"].str.contains("Rival").any()
@@ -0,0 +1,47 @@
+# tests/test_intervals.py
+"""Intervalos de confianza (intervals.py) y ranking por su límite inferior (`utils.create_performance_df`)."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from intervals import bootstrap_intervals
+from utils import create_performance_df
+
+
+def _record(name, wins, losses):
+    result = ["W"] * wins + ["L"] * losses
+    return pd.DataFrame({"Teammate": name, "Result": result, "Merit": 0.5, "Quimica": 5.0, "Rendiment": 5.0,
+                         "Game-Diff": [2.0 if r == "W" else -2.0 for r in result]})
+
+
+@pytest.fixture
+def matches():
+    return pd.concat([_record("Ana", 2, 0), _record("Berta", 60, 20), _record("Carla", 5, 15)], ignore_index=True)
+
+
+def test_bayes_interval_is_not_degenerate_for_small_perfect_records(matches):
+    bootstrap = bootstrap_intervals(matches, "Teammate")
+    bayes = bootstrap_intervals(matches, "Teammate", method="bayes")
+    # Remuestrear 2 victorias de 2 siempre da 100%; la posterior Beta(3, 1) no
+    assert bootstrap.loc["Ana", "Win_Rate_IC_Inf"] == 100
+    assert bayes.loc["Ana", "Win_Rate_IC_Inf"] < bayes.loc["Berta", "Win_Rate_IC_Inf"]
+    assert bayes.loc["Ana", "Win_Rate_IC_Sup"] > bayes.loc["Ana", "Win_Rate_IC_Inf"]
+
+
+def test_ranking_puts_long_good_record_ahead_of_small_perfect_one(matches):
+    performance = create_performance_df(matches, "Teammate", "Compañero").set_index("Compañero")
+    assert performance.loc["Berta", "Ranking_IC"] == 1
+    assert performance.loc["Ana", "Ranking_IC"] == 2
+    assert performance.loc["Carla", "Ranking_IC"] == 3
+
+
+def test_groups_without_decided_matches_get_zero_interval():
+    df = pd.concat([_record("Ana", 3, 1), pd.DataFrame({"Teammate": "Dani", "Result": ["N", "N"], "Merit": 0.0})])
+    intervals = bootstrap_intervals(df, "Teammate", method="bayes")
+    assert intervals.loc["Dani", ["Win_Rate_IC_Inf", "Win_Rate_IC_Sup"]].tolist() == [0, 0]
+    assert np.isfinite(intervals.loc["Ana"]).all()
+
+
+def test_group_column_without_values_gives_empty_table(matches):
+    assert bootstrap_intervals(matches.assign(Teammate=None), "Teammate", method="bayes").empty
+    assert create_performance_df(matches.assign(Teammate=None), "Teammate", "Compañero").empty
@@ -0,0 +1,85 @@
+# tests/test_moments.py
+"""Momentos fusionables (moments.py) frente a los cálculos de pandas sobre las filas."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from moments import METRIC_COLS, Moments, PartitionedMoments, build_partitioned_moments
+from views import _select_moments, default_filters, normalize_filters
+from utils import apply_filters, build_filter_options
+
+
+@pytest.fixture
+def matches():
+    rng = np.random.default_rng(11)
+    n = 2000
+    dates = pd.Timestamp("2021-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 3 * 365, n)), unit="D")
+    df = pd.DataFrame({
+        "Date": dates,
+        "Year": dates.year,
+        "Month": dates.month_name(),
+        "Weekday": dates.day_name(),
+        "Location": rng.choice(["Club A", "Club B", "Club C"], n),
+        "Teammate": rng.choice([f"Jugador {i}" for i in range(8)], n),
+        "Opponent": rng.choice(["Rival 1", "Rival 2", "Rival 3"], n),
+        "Result": rng.choice(["W", "L", "N"], n),
+        "Merit": rng.normal(0, 1, n),
+        "Quimica": rng.integers(1, 11, n).astype(float),
+        "Rendiment": rng.integers(1, 11, n).astype(float),
+        "Game-Diff": rng.integers(-6, 7, n).astype(float),
+    })
+    df["Rendiment"] += 0.3 * df["Quimica"]  # Alguna correlación que medir
+    return df
+
+
+def assert_moments_equal(moments, rows):
+    assert moments.n == len(rows)
+    pd.testing.assert_series_equal(moments.means(), rows[METRIC_COLS].mean(), check_names=False)
+    pd.testing.assert_frame_equal(moments.cov(), rows[METRIC_COLS].cov())
+    pd.testing.assert_frame_equal(moments.corr(), rows[METRIC_COLS].corr())
+
+
+def test_merge_and_push_match_pandas(matches):
+    a, b = matches.iloc[:700], matches.iloc[700:]
+    assert_moments_equal(Moments.from_frame(a) + Moments.from_frame(b), matches)
+    pushed = Moments(METRIC_COLS)
+    for row in a[METRIC_COLS].to_numpy():
+        pushed.push(row)
+    assert_moments_equal(pushed, a)
+
+
+def test_partitions_are_built_only_when_compact(matches):
+    partitions = build_partitioned_moments(matches)
+    assert partitions is not None and len(partitions.n) < len(matches) / 4
+    # Con claves casi únicas por fila no compensa: no se construye
+    assert build_partitioned_moments(matches, keys=["Date", "Teammate", "Location", "Result"]) is None
+
+
+@pytest.mark.parametrize("changes, merged", [
+    ({}, True),
+    ({"year": [2022], "result": ["W", "L"]}, True),
+    ({"month": ["March", "April"], "date_range": ["2021-03-15", "2023-04-10"]}, True),
+    ({"opponent": []}, True),                               # Sin filtro de rival
+    ({"teammate": ["Jugador 1", "Jugador 2"]}, False),      # No es clave de partición: se parte de las filas
+    ({"opponent": ["Rival 1"]}, False),
+])
+def test_selection_matches_filtered_rows(matches, changes, merged):
+    filters = normalize_filters({**default_filters(build_filter_options(matches)), **changes})
+    filtered = apply_filters(matches, filters)
+    partitions = build_partitioned_moments(matches)
+    selected = _select_moments(partitions, filters, filtered)
+    assert (selected.base is partitions.base) == merged
+    assert_moments_equal(selected.total(), filtered)
+    for result, moments in selected.by("Result").items():
+        assert_moments_equal(moments, filtered[filtered["Result"] == result])
+
+
+def test_rolling_corr_matches_window_of_days(matches):
+    selected = PartitionedMoments.from_frame(matches, keys=["Result"])
+    rolling = selected.rolling_corr("Quimica", "Rendiment", window_days=90)
+    days = matches["Date"].drop_duplicates()
+    assert list(rolling["Date"]) == list(days)
+    for day, corr, n in rolling.sample(20, random_state=0).itertuples(index=False):
+        window = matches[(matches["Date"] > day - pd.Timedelta(days=90)) & (matches["Date"] <= day)]
+        assert n == len(window)
+        assert corr == pytest.approx(window["Quimica"].corr(window["Rendiment"]), nan_ok=True)
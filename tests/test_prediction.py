@@ -0,0 +1,94 @@
+# tests/test_prediction.py
+"""Modelo de victoria (prediction.py): ajuste, inferencia por lotes, planificador y lecturas concurrentes."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from prediction import L2, WinModel, _factor_values
+
+
+def _matches(n, seed=0, teammates=6):
+    rng = np.random.default_rng(seed)
+    hours = [f"{h:02d}:30" for h in rng.integers(8, 23, n)]
+    df = pd.DataFrame({
+        "Hour": pd.to_datetime(pd.Series(hours), format="%H:%M").dt.time,
+        "Teammate": rng.choice([f"Jugador {i}" for i in range(teammates)], n),
+        "Location": rng.choice(["Club A", "Club B", "Club C"], n),
+        "Opponent": rng.choice(["Rival 1", "Rival 2", None], n),
+        "Weekday": rng.choice(["Monday", "Friday", "Sunday"], n),
+    })
+    # Jugador 0 gana mucho más que el resto
+    p = np.where(df["Teammate"] == "Jugador 0", 0.8, 0.45)
+    df["Result"] = np.where(rng.random(n) < p, "W", "L")
+    return df
+
+
+@pytest.fixture
+def model():
+    return WinModel().fit(_matches(600), snapshot="s1")
+
+
+def test_fit_reaches_penalized_optimum(model):
+    # Gradiente de la log-verosimilitud penalizada (con one-hot explícito) nulo en los pesos ajustados
+    df = _matches(600)
+    state = model.state
+    values = _factor_values(df)
+    X = np.zeros((len(df), len(state.weights)))
+    X[:, 1] = 1
+    for (factor, value), i in state.features.items():
+        X[:, i] = values[factor] == value
+    y = (df["Result"] == "W").to_numpy(dtype=float)
+    p = 1 / (1 + np.exp(-X @ state.weights))
+    penalty = np.full(len(state.weights), L2)
+    penalty[:2] = 0
+    grad = X.T @ (p - y) + penalty * state.weights
+    assert np.abs(grad[1:]).max() < 1e-4
+    assert model.info["Partidos"] == len(df)
+
+
+def test_predict_matches_plan_and_ignores_unseen_values(model):
+    plan, evaluated = model.plan({"Teammate": ["Jugador 0", "Jugador 3"], "Location": ["Club A", "Club B"]}, top_k=4)
+    assert evaluated == 4 and len(plan) == 4
+    assert plan.loc[0, "Teammate"] == "Jugador 0"
+    scored = model.predict(plan[["Teammate", "Location"]]) * 100
+    np.testing.assert_allclose(scored, plan["Probabilidad_Victoria"])
+    unseen = model.predict(pd.DataFrame({"Teammate": ["Nadie"], "Location": ["Club A"]}))
+    only_location = model.predict(pd.DataFrame({"Location": ["Club A"]}))
+    np.testing.assert_allclose(unseen, only_location)
+
+
+def test_refit_is_skipped_for_same_snapshot_or_data(model):
+    state = model.state
+    model.fit(_matches(10), snapshot="s1")  # Mismo snapshot: ni se miran los datos
+    assert model.state is state
+    model.fit(_matches(600), snapshot="s2")  # Mismos datos con otro snapshot: sólo cambia el snapshot
+    assert model.snapshot == "s2" and model.state.weights is state.weights
+    model.fit(_matches(900, seed=1, teammates=9), snapshot="s3")  # Filas nuevas: más parámetros
+    assert len(model.state.weights) > len(state.weights)
+    assert not model.state.weights.flags.writeable
+
+
+def test_factor_without_values_is_ignored():
+    model = WinModel().fit(_matches(200).assign(Opponent=None))
+    assert not any(factor == "Opponent" for factor, _ in model.state.features)
+    assert np.isfinite(model.predict(pd.DataFrame({"Opponent": ["Rival 1"]}))).all()
+
+
+def test_predict_reads_one_complete_state_while_refitting(monkeypatch):
+    # Re-entrena el modelo (con más compañeros y pesos nuevos) mientras `predict` codifica los valores:
+    # es el punto en que otro hilo puede publicar un ajuste nuevo a mitad de una lectura
+    model = WinModel().fit(_matches(300, teammates=3))
+    configs = pd.DataFrame({"Teammate": ["Jugador 1", "Jugador 2"], "Location": ["Club A", "Club B"]})
+    expected = model.predict(configs)
+    factorize, refitted = pd.factorize, []
+
+    def refitting_factorize(*args, **kwargs):
+        if not refitted:
+            refitted.append(True)
+            model.fit(_matches(1200, seed=1, teammates=12))
+        return factorize(*args, **kwargs)
+
+    monkeypatch.setattr(pd, "factorize", refitting_factorize)
+    scored = model.predict(configs)
+    assert refitted and model.info["Partidos"] == 1200
+    np.testing.assert_allclose(scored, expected)  # Índices y pesos del mismo ajuste (el anterior)
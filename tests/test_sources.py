@@ -0,0 +1,136 @@
+# tests/test_sources.py
+"""Carga federada (sources.py) contra un servidor HTTP local que sirve dos CSV con `ETag`."""
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import sources
+from sources import FederatedLoader
+
+
+def _csv(rows, teammate):
+    lines = ["Date,Hour,Location,Teammate,Opponent,Result,Merit,Game-Diff,Quimica,Rendiment"]
+    lines += [f"{day:02d}/03/2024,19:30,Club A,{teammate},Rival 1,{'W' if day % 2 else 'L'},\"0,{day}\",2,7,8"
+              for day in range(1, rows + 1)]
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+        if server.barrier is not None:
+            server.barrier.wait()  # Sólo se pasa si las dos descargas están en curso a la vez
+        if self.path in server.failing:
+            self.send_error(500)
+            return
+        content = server.files[self.path]
+        etag = '"%s"' % hashlib.sha1(content).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.lock, httpd.requests, httpd.failing, httpd.barrier = threading.Lock(), [], set(), None
+    httpd.files = {"/a.csv": _csv(10, "Ana"), "/b.csv": _csv(6, "Berta")}
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def configured(server):
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    return [{"name": "Temporada A", "url": f"{base}/a.csv"}, {"name": "Temporada B", "url": f"{base}/b.csv"}]
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """Fuentes procesadas, en orden (cuenta las llamadas a `parse_matches`)."""
+    calls, parse = [], sources.parse_matches
+
+    def counting(content):
+        df, missing = parse(content)
+        calls.append(df["Teammate"].iloc[0])
+        return df, missing
+
+    monkeypatch.setattr(sources, "parse_matches", counting)
+    return calls
+
+
+def _rows(report):
+    return {source["Source"]: source["Filas"] for source in report}
+
+
+def test_sources_load_concurrently(server, configured, parses):
+    server.barrier = threading.Barrier(2, timeout=5)
+    df, report = FederatedLoader(max_workers=2).load(configured)
+    assert [source["Error"] for source in report] == [None, None]
+    assert _rows(report) == {"Temporada A": 10, "Temporada B": 6}
+    assert sorted(df["Source"].unique()) == ["Temporada A", "Temporada B"]
+    assert df["Date"].is_monotonic_increasing
+
+
+def test_unchanged_sources_are_not_parsed_again(server, configured, parses):
+    loader = FederatedLoader(max_workers=2)
+    first, report = loader.load(configured)
+    second, again = loader.load(configured)
+    assert sorted(parses) == ["Ana", "Berta"]  # La segunda carga recibe 304 y no procesa nada
+    assert [source["Actualizada"] for source in again] == [False, False]
+    assert sources.snapshot_id(again) == sources.snapshot_id(report)
+    assert second.equals(first)
+
+
+def test_changed_source_is_refreshed(server, configured, parses):
+    loader = FederatedLoader(max_workers=2)
+    _, report = loader.load(configured)
+    server.files["/b.csv"] = _csv(9, "Berta")
+    df, again = loader.load(configured)
+    assert sorted(parses) == ["Ana", "Berta", "Berta"]
+    assert [source["Actualizada"] for source in again] == [False, True]
+    assert _rows(again) == {"Temporada A": 10, "Temporada B": 9} and len(df) == 19
+    assert sources.snapshot_id(again) != sources.snapshot_id(report)
+
+
+def test_failing_source_keeps_last_good_frame(server, configured, parses):
+    loader = FederatedLoader(max_workers=2)
+    first, report = loader.load(configured)
+    server.failing.add("/a.csv")
+    server.files["/b.csv"] = _csv(9, "Berta")
+    df, again = loader.load(configured)
+    assert "500" in again[0]["Error"] and again[1]["Error"] is None
+    assert _rows(again) == {"Temporada A": 10, "Temporada B": 9}
+    assert df[df["Source"] == "Temporada A"].reset_index(drop=True).equals(
+        first[first["Source"] == "Temporada A"].reset_index(drop=True))
+
+
+def test_duplicate_source_names_are_rejected(configured):
+    duplicated = [configured[0], dict(configured[1], name=configured[0]["name"])]
+    with pytest.raises(ValueError, match="Temporada A"):
+        FederatedLoader(max_workers=2).load(duplicated)
+
+
+def test_reset_forgets_sources(server, configured, parses):
+    loader = FederatedLoader(max_workers=2)
+    loader.load(configured)
+    loader.reset()
+    _, report = loader.load(configured)
+    assert sorted(parses) == ["Ana", "Ana", "Berta", "Berta"]  # Sin validadores: se descargan y procesan de nuevo
+    assert [source["Actualizada"] for source in report] == [True, True]
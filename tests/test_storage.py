@@ -0,0 +1,69 @@
+# tests/test_storage.py
+"""Almacén particionado por año (storage.py): ventana de fechas, escritura incremental y poda de particiones."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from storage import MANIFEST, PartitionedStore, date_window, read_manifest, write_partitions
+
+
+@pytest.fixture
+def matches():
+    rng = np.random.default_rng(3)
+    n = 300
+    dates = pd.Timestamp("2021-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 3 * 365, n)), unit="D")
+    return pd.DataFrame({
+        "Date": dates,
+        "Year": dates.year,
+        "Month": dates.month_name(),
+        "Weekday": dates.day_name(),
+        "Location": rng.choice(["Club A", "Club B"], n),
+        "Teammate": rng.choice(["Ana", "Berta", "Carla"], n),
+        "Result": rng.choice(["W", "L", "N"], n),
+        "Merit": rng.normal(0, 1, n),
+    })
+
+
+@pytest.mark.parametrize("years, date_range", [
+    ([2022], ["2021-01-01", "2024-12-31"]),
+    ([2021, 2022, 2023], ["2022-05-10", "2023-02-01"]),
+    ([2021, 2023], ["2021-01-01", "2024-12-31"]),  # Años no contiguos: la ventana va del primero al último
+    ([2030], ["2021-01-01", "2024-12-31"]),
+    ([], ["2021-01-01", "2024-12-31"]),
+])
+def test_date_window_matches_mask(matches, years, date_range):
+    window = matches.iloc[date_window(matches["Date"].to_numpy(), years, date_range)]
+    if years:
+        start = max(pd.Timestamp(date_range[0]), pd.Timestamp(min(years), 1, 1))
+        end = min(pd.Timestamp(date_range[1]), pd.Timestamp(max(years), 12, 31))
+        expected = matches[matches["Date"].between(start, end)]
+    else:
+        expected = matches.iloc[:0]
+    pd.testing.assert_frame_equal(window, expected)
+
+
+def test_write_partitions_is_incremental(matches, tmp_path):
+    assert write_partitions(matches, tmp_path) == (3, 3)
+    assert write_partitions(matches, tmp_path) == (0, 3)  # Sin cambios no se reescribe nada
+
+    changed = matches.copy()
+    changed.loc[changed["Year"] == 2022, "Merit"] += 1
+    assert write_partitions(changed, tmp_path) == (1, 3)
+
+    assert write_partitions(changed[changed["Year"] != 2021], tmp_path) == (0, 2)
+    assert sorted(p.name for p in tmp_path.glob("year=*.parquet")) == ["year=2022.parquet", "year=2023.parquet"]
+    assert set(read_manifest(tmp_path)["partitions"]) == {"2022", "2023"}
+
+
+def test_partitions_for_and_load(matches, tmp_path):
+    write_partitions(matches, tmp_path)
+    store = PartitionedStore(tmp_path)
+    assert (tmp_path / MANIFEST).exists()
+    assert store.partitions_for([2021, 2022, 2023], ["2022-01-01", "2022-12-31"]) == ["2022"]
+    assert store.partitions_for([2021, 2023], ["2021-06-01", "2023-01-15"]) == ["2021", "2023"]
+    assert store.partitions_for([2022], ["2023-01-01", "2023-12-31"]) == []
+
+    loaded = store.load([2022, 2023], ["2021-01-01", "2024-12-31"])
+    expected = matches[matches["Year"].isin([2022, 2023])].reset_index(drop=True)
+    pd.testing.assert_frame_equal(loaded, expected, check_dtype=False)
+    assert store.load([2030], ["2021-01-01", "2024-12-31"]).empty
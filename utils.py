@@ -3,32 +3,77 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 
-@st.cache_data(show_spinner=False)
+from intervals import bootstrap_intervals
+from aggregations import aggregate, performance_spec
+from storage import date_window
+from sources import REFRESH_TTL, configured_sources, federated_loader, snapshot_id
+
+@st.cache_data(show_spinner=False, ttl=REFRESH_TTL)
 def load_data():
-    """Carga y pre-procesa los datos desde una URL de Google Sheets."""
+    """
+    Carga y pre-procesa los partidos de todas las fuentes configuradas (ver sources.py).
+    Cada `REFRESH_TTL` segundos se comprueba si alguna fuente ha cambiado; sólo esas se re-procesan.
+    Devuelve `(df, snapshot)`: la huella de los datos se calcula aquí una vez, no en cada re-ejecución.
+    """
     try:
-        url = "https://docs.google.com/spreadsheets/d/e/2PACX-1vR3HRJ4LcbIqwxl2ffbR-HDjXgG_dNyetWGTOLfcHGU9yl4lGYki2LoFR2hbLdcyCS1bLwPneVSDwCZ/pub?gid=0&single=true&output=csv"
-        df = pd.read_csv(url, parse_dates=["Date"], dayfirst=True)
-        df = df.sort_values(by="Date").reset_index(drop=True)
-        df["Hour"] = pd.to_datetime(df["Hour"], format="%H:%M", errors="coerce").dt.time
-        df["Year"] = df["Date"].dt.year
-        df["Month"] = df["Date"].dt.month_name()
-        df["Weekday"] = df["Date"].dt.day_name()
-
-        numeric_cols = ["Merit", "Game-Diff", "Quimica", "Rendiment"]
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = df[col].astype(str).str.replace(',', '.', regex=False)
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-            else:
-                df[col] = 0
-                st.warning(f"Advertencia: La columna '{col}' no se encontró. Se usarán ceros.")
-
-        df["Rating"] = df["Merit"] # 'Rating' ahora es el 'Merit' del partido.
-        return df
+        df, report = federated_loader.load(configured_sources())
+        for source in report:
+            if source["Error"]:
+                st.warning(f"No se pudo actualizar la fuente '{source['Source']}': {source['Error']}")
+            for col in source["Columnas_ausentes"]:
+                st.warning(f"Advertencia: La columna '{col}' no se encontró en '{source['Source']}'. Se usarán ceros.")
+        if df.empty:
+            raise ValueError("ninguna fuente tiene datos")
+        return df, snapshot_id(report)
     except Exception as e:
         st.error(f"Error al cargar datos: {e}. Usando un DataFrame vacío.")
-        return pd.DataFrame()
+        return pd.DataFrame(), None
+
+@st.cache_data(show_spinner=False)
+def build_filter_options(df):
+    """Valores disponibles para cada filtro de la barra lateral (serializables en JSON)."""
+    month_order = list(pd.to_datetime(df['Date']).dt.month_name().unique())
+    options = {
+        "Year": sorted(int(y) for y in df["Year"].dropna().unique()),
+        "Month": sorted(df["Month"].dropna().unique(), key=lambda m: month_order.index(m)),
+        "Location": sorted(df["Location"].dropna().unique()),
+        "Teammate": sorted(df["Teammate"].dropna().unique()),
+        "Date": [df["Date"].min().isoformat(), df["Date"].max().isoformat()],
+        # Los más frecuentes en todo el historial (valores por defecto del planificador)
+        "Frecuentes": {col: list(df[col].value_counts().index[:5]) for col in ["Teammate", "Location"]},
+    }
+    if "Opponent" in df.columns:
+        options["Opponent"] = sorted(df["Opponent"].dropna().unique())
+    if "Source" in df.columns and df["Source"].nunique() > 1:
+        options["Source"] = sorted(df["Source"].dropna().unique())
+    return options
+
+def filter_mask(frame, year, month, weekday, location, teammate, result, date_range, opponent=None, source=None):
+    """
+    Máscara booleana con los filtros de la barra lateral. Sirve para filas o para particiones: las
+    columnas que no están en `frame` no filtran.
+    """
+    mask = pd.Series(True, index=frame.index)
+    for col, values in [("Year", year), ("Month", month), ("Weekday", weekday), ("Location", location),
+                        ("Teammate", teammate), ("Result", result)]:
+        if col in frame.columns:
+            mask &= frame[col].isin(values)
+    if "Date" in frame.columns:  # Las particiones de momentos no tienen fecha: resuelven el rango aparte
+        mask &= frame["Date"].between(pd.to_datetime(date_range[0]), pd.to_datetime(date_range[1]))
+    if "Opponent" in frame.columns and opponent:
+        mask &= frame["Opponent"].isin(opponent)
+    if "Source" in frame.columns and source:
+        mask &= frame["Source"].isin(source)
+    return mask
+
+def apply_filters(df, filters):
+    """
+    Aplica los filtros de la barra lateral (dict con los argumentos de `filter_mask`).
+    Año y rango de fechas se resuelven con searchsorted sobre las filas ordenadas por fecha y el
+    resto de filtros sólo se evalúa sobre ese tramo contiguo.
+    """
+    window_df = df.iloc[date_window(df["Date"].to_numpy(), filters["year"], filters["date_range"])]
+    return window_df[filter_mask(window_df, **filters)]
 
 def scale_value(value, min_val, max_val):
     """Escala un valor entre 0 y 1."""
@@ -90,30 +135,34 @@ def calculate_advanced_win_probability(performance_df):
     return final_prob.round(1)
 
 
-def create_performance_df(df, group_col, entity_name):
-    """Crea un DataFrame de rendimiento para una columna de agrupación específica."""
+def create_performance_df(df, group_col, entity_name, aggregated=None):
+    """
+    Crea un DataFrame de rendimiento para una columna de agrupación específica.
+    `aggregated` es `performance_spec(group_col)` ya resuelta en el plan de agregaciones de la vista.
+    """
     if df.empty or group_col not in df.columns:
         return pd.DataFrame()
 
-    performance = df.groupby(group_col).agg({
-        'Result': ['count', lambda x: (x == 'W').sum()],
-        'Merit': 'mean', # Esto es el Rating +/- promedio
-        'Quimica': 'mean',
-        'Rendiment': 'mean',
-        'Game-Diff': 'mean'
-    }).round(2)
-
-    performance.columns = ['Total_Partidos', 'Victorias', 'Merit_Avg', 'Quimica_Avg', 'Rendiment_Avg', 'GameDiff_Avg']
-    
-    # Calcular % de Victorias (sin contar empates)
-    performance['Win_Rate_Sin_Empates'] = (performance['Victorias'] / (df.groupby(group_col)['Result'].apply(lambda x: (x != 'N').sum())) * 100).fillna(0).round(1)
+    # Partidos, victorias, medias (Merit es el Rating +/- promedio) y % de victorias sin contar empates
+    performance = aggregated if aggregated is not None else aggregate(df, {"performance": performance_spec(group_col)})["performance"]
+    performance = performance.copy()
+    performance['Win_Rate_Sin_Empates'] = performance['Win_Rate_Sin_Empates'].fillna(0).round(1)
+    performance = performance.round(2)
 
     # *** LLAMADA A LA NUEVA FUNCIÓN DE PROBABILIDAD ***
     performance['Probabilidad_Victoria'] = calculate_advanced_win_probability(performance)
+
+    # Intervalos de confianza y ranking por el límite inferior (penaliza grupos con pocos partidos).
+    # Posterior Beta: el bootstrap da un intervalo de ancho 0 a un 2/2, que quedaría por delante de un 60/80
+    intervals = bootstrap_intervals(df[[group_col, 'Result', 'Merit']], group_col, method="bayes")
+    performance = performance.join(intervals)
+    performance['Ranking_IC'] = performance['Win_Rate_IC_Inf'].rank(ascending=False, method='min').astype(int)
     
     performance = performance.sort_values('Probabilidad_Victoria', ascending=False)
     performance.index.name = entity_name
-    return performance.reset_index()
+    performance = performance.reset_index()
+    performance.attrs = dict(intervals.attrs)  # Remuestreos de los intervalos (ver intervals.py)
+    return performance
 
 
 def calculate_all_streaks(df):
@@ -142,4 +191,30 @@ def calculate_all_streaks(df):
             
     if current_win_streak > 0: win_streaks.append(current_win_streak)
     if current_loss_streak > 0: loss_streaks.append(current_loss_streak)
-    return win_streaks, loss_streaks
\ No newline at end of file
+    return win_streaks, loss_streaks
+
+
+def cumulative_merit_frame(df, group_col, top_n=5):
+    """
+    Merit acumulado día a día para los `top_n` valores más frecuentes de `group_col`,
+    rellenando con ceros los días sin partido para que la línea se mantenga plana.
+    """
+    # Obtener los valores con más partidos
+    top_values = df[group_col].value_counts().nlargest(top_n).index
+    df_top = df[df[group_col].isin(top_values)].copy()
+
+    # Asegurar que Date es datetime
+    df_top['Date'] = pd.to_datetime(df_top['Date'])
+
+    # Crear un MultiIndex con todas las combinaciones de fechas y valores top
+    date_range = pd.date_range(start=df_top['Date'].min(), end=df_top['Date'].max(), freq='D')
+    multi_index = pd.MultiIndex.from_product([top_values, date_range], names=[group_col, 'Date'])
+
+    # Sumar Merit diario y completar días sin partidos con mérito = 0
+    df_played = df_top.groupby([group_col, 'Date'])['Merit'].sum().reset_index()
+    df_full = df_played.set_index([group_col, 'Date']).reindex(multi_index, fill_value=0).reset_index()
+
+    # Calcular acumulado y preparar tooltip limpio (sin valor en los días no jugados)
+    df_full['Merit_Cumsum'] = df_full.groupby(group_col)['Merit'].cumsum()
+    df_full['Tooltip_Merit'] = df_full['Merit'].replace(0, np.nan)
+    return df_full
@@ -0,0 +1,281 @@
+# views.py
+"""
+Preparación de una vista del dashboard (filtros -> datos) y pre-calentamiento en segundo plano
+de los presets de filtros más habituales, para que sean aciertos de caché desde la primera visita.
+"""
+import json
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pandas as pd
+
+from utils import apply_filters, filter_mask, create_performance_df, cumulative_merit_frame
+from moments import PartitionedMoments, build_partitioned_moments
+from taskgraph import TaskGraph
+import pagination
+from pagination import sort_permutations
+from memory import PREWARM_OWNER, memory_manager, nbytes, session_id
+import charts
+from insights import mine_insights
+from aggregations import AggregationPlan, performance_spec
+from tabs import temporal, estadisticas
+
+ALL_WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+ALL_RESULTS = ["W", "L", "N"]
+
+# Clave de cada filtro en st.session_state (widgets de la barra lateral)
+FILTER_KEYS = {
+    "year": "year_filter", "month": "month_filter", "weekday": "weekday_filter", "location": "location_filter",
+    "teammate": "teammate_filter", "result": "result_filter", "opponent": "opponent_filter",
+    "source": "source_filter",
+    "date_range": "date_filter",
+}
+FILTER_LABELS = {
+    "year": "Año", "month": "Mes", "weekday": "Día", "location": "Lugar", "teammate": "Compañero",
+    "result": "Resultado", "opponent": "Rival", "source": "Fuente", "date_range": "Fechas",
+}
+
+TOP_LOCATION_PRESETS = 3     # Presets fijos para los lugares más frecuentes
+MAX_LEARNED_PRESETS = 5      # Presets aprendidos del uso que se pre-calientan
+MIN_USES_TO_LEARN = 2        # Usos necesarios para que una combinación de filtros se aprenda
+MAX_TRACKED_FILTERS = 500    # Combinaciones de filtros recordadas; al llenarse, los recuentos envejecen
+PREWARM_WORKERS = 2
+
+
+def normalize_filters(filters):
+    """Forma canónica de los filtros (listas y fechas ISO) para que las claves de caché coincidan."""
+    normalized = {key: list(value) for key, value in filters.items() if key != "date_range"}
+    normalized["date_range"] = [pd.to_datetime(d).date().isoformat() for d in filters["date_range"]]
+    return normalized
+
+
+def default_filters(options):
+    """Filtros por defecto: todo seleccionado."""
+    return normalize_filters({
+        "year": options["Year"], "month": options["Month"], "weekday": ALL_WEEKDAYS,
+        "location": options["Location"], "teammate": options["Teammate"], "result": ALL_RESULTS,
+        "date_range": options["Date"], "opponent": options.get("Opponent", []),
+        "source": options.get("Source", []),
+    })
+
+
+def describe(filters, defaults):
+    """Nombre legible de un preset: sólo los filtros que difieren de los valores por defecto."""
+    parts = []
+    for key, value in filters.items():
+        if value != defaults.get(key):
+            shown = " – ".join(value) if key == "date_range" else ", ".join(str(v) for v in value[:3])
+            parts.append(f"{FILTER_LABELS[key]}: {shown}{'…' if key != 'date_range' and len(value) > 3 else ''}")
+    return " · ".join(parts) or "Todo"
+
+
+def _hour_frame(filtered_df, plan):
+    # Sólo las columnas que usan las tablas de rendimiento, no una copia completa; la franja horaria
+    # es la columna derivada que ya calculó el plan de agregaciones
+    hour_df = filtered_df[["Result", "Merit", "Quimica", "Rendiment", "Game-Diff"]].copy()
+    hour_df['Hour_Category'] = plan.column("Hour_Category")
+    return hour_df
+
+
+_partitions = {}                # snapshot -> PartitionedMoments del historial completo (o None si no compensa)
+_partitions_lock = threading.Lock()
+
+
+def partitioned_moments(snapshot, load_full):
+    """Momentos por partición del historial completo, una vez por snapshot de datos (sólo el último)."""
+    with _partitions_lock:
+        if snapshot not in _partitions:
+            partitions = build_partitioned_moments(load_full())
+            _partitions.clear()
+            _partitions[snapshot] = partitions
+        return _partitions[snapshot]
+
+
+def _partitions_bytes():
+    with _partitions_lock:
+        return nbytes(_partitions)
+
+
+def clear_partitioned_moments():
+    with _partitions_lock:
+        _partitions.clear()
+
+
+def _select_moments(partitions, filters, filtered):
+    # Las particiones sólo sirven si los filtros que no son claves de partición dejan pasar todas las filas
+    if partitions is None or not all(filter_mask(pd.DataFrame({col: values}), **filters).all()
+                                     for col, values in partitions.values.items()):
+        return PartitionedMoments.from_frame(filtered, keys=["Result"])
+    return partitions.select(filter_mask(partitions.keys, **filters), filters["date_range"])
+
+
+def _correlations(metric_moments):
+    return {
+        "corr": metric_moments.total().corr(),
+        "rolling": metric_moments.rolling_corr("Quimica", "Rendiment", window_days=90).dropna(),
+    }
+
+
+def view_aggregations(df):
+    """Agregaciones declaradas por las pestañas y las tablas de rendimiento de la vista."""
+    specs = {**temporal.AGGREGATIONS, **estadisticas.AGGREGATIONS}
+    for group_col in ["Teammate", "Location", "Hour_Category", "Opponent"]:
+        if group_col != "Opponent" or "Opponent" in df.columns:
+            specs[f"performance_{group_col}"] = performance_spec(group_col)
+    return specs
+
+
+def build_view_graph(df, filters, load_partitions=lambda: None):
+    """
+    Grafo de la preparación de una vista: el filtrado y, a partir de él, las tablas de rendimiento
+    y la preparación de datos de cada pestaña, que son independientes entre sí.
+    `load_partitions()` devuelve los momentos por partición del historial completo (o None).
+    """
+    graph = TaskGraph()
+    graph.add("filtered", lambda: apply_filters(df, filters))
+    graph.add("moments", lambda f: _select_moments(load_partitions(), filters, f), ["filtered"])
+
+    # Todas las tablas agregadas de la vista en un único plan (claves compartidas = una sola pasada)
+    graph.add("plan", AggregationPlan, ["filtered"])
+    graph.add("aggregates", lambda p: p.run(view_aggregations(df)) if not p.df.empty else {}, ["plan"])
+    # Después de "aggregates": el plan no se usa desde dos hilos a la vez y sus columnas ya están calculadas
+    graph.add("hour_frame", lambda f, p, a: _hour_frame(f, p), ["filtered", "plan", "aggregates"])
+
+    graph.add("teammates", lambda f, a: create_performance_df(f, 'Teammate', 'Compañero', a.get("performance_Teammate")),
+              ["filtered", "aggregates"])
+    graph.add("locations", lambda f, a: create_performance_df(f, 'Location', 'Lugar', a.get("performance_Location")),
+              ["filtered", "aggregates"])
+    graph.add("hours", lambda f, a: create_performance_df(f, 'Hour_Category', 'Hora', a.get("performance_Hour_Category")),
+              ["hour_frame", "aggregates"])
+    graph.add("opponents", lambda f, a: create_performance_df(f, 'Opponent', 'Rival', a.get("performance_Opponent"))
+              if "Opponent" in df.columns else pd.DataFrame(), ["filtered", "aggregates"])
+
+    graph.add("temporal", lambda f, a: temporal.prepare_data(f, a) if not f.empty else None, ["filtered", "aggregates"])
+    graph.add("estadisticas", lambda f, a: estadisticas.prepare_data(f, a) if not f.empty else None,
+              ["filtered", "aggregates"])
+    graph.add("cumulative_teammates", lambda f: cumulative_merit_frame(f, 'Teammate') if not f.empty else None, ["filtered"])
+    graph.add("cumulative_locations", lambda f: cumulative_merit_frame(f, 'Location') if not f.empty else None, ["filtered"])
+    graph.add("correlations", _correlations, ["moments"])
+    graph.add("sort_orders", sort_permutations, ["filtered"])
+    graph.add("insights", lambda f: mine_insights(f) if not f.empty else None, ["filtered"])
+    return graph
+
+
+def prepare_view(df, filters, load_partitions=lambda: None):
+    """
+    Datos filtrados, tablas de rendimiento y datos de las pestañas de una vista. Las tareas
+    independientes se ejecutan en paralelo; `timings` guarda el informe de la ejecución (camino
+    crítico incluido).
+    """
+    graph = build_view_graph(df, filters, load_partitions)
+    view = graph.run()
+    view["timings"] = graph.report()
+    return view
+
+
+def get_view(snapshot, load_for, filters, load_full, owner=None):
+    """
+    Vista cacheada por snapshot de datos + filtros en la caché con contabilidad de memoria
+    (ver memory.py); `owner` es la sesión a la que se atribuye (por defecto, la actual).
+    `load_for(filters)` devuelve el DataFrame base y `load_full()` el historial completo; sólo se
+    llaman si la vista no está en caché.
+    """
+    key = (snapshot, json.dumps(filters, sort_keys=True, default=str))
+    return memory_manager.get_or_compute(key, owner or session_id(), lambda: prepare_view(
+        load_for(filters), filters, lambda: partitioned_moments(snapshot, load_full)))
+
+
+# Cachés secundarias, con su tamaño real: cuentan para los límites y se vacían en modo degradado.
+# Lo que calcula el grafo de la vista (tablas, datos de pestañas, intervalos) vive sólo en la vista.
+memory_manager.register_cache("chart_specs", charts.cache_bytes, charts.clear_cache)
+memory_manager.register_cache("partitioned_moments", _partitions_bytes, clear_partitioned_moments)
+memory_manager.register_cache("search_masks", pagination.cache_bytes, pagination.clear_cache)
+
+
+class PresetRegistry:
+    """Presets de filtros: fijos (por defecto, este año, últimos 3 meses, lugares frecuentes) y aprendidos del uso."""
+
+    def __init__(self):
+        self._usage = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, filters):
+        key = json.dumps(filters, sort_keys=True, default=str)
+        with self._lock:
+            if key not in self._usage and len(self._usage) >= MAX_TRACKED_FILTERS:
+                # Envejecimiento: los recuentos se reducen a la mitad y se olvidan los que llegan a 0
+                self._usage = Counter({k: n // 2 for k, n in self._usage.items() if n // 2})
+            self._usage[key] += 1
+
+    def clear(self):
+        with self._lock:
+            self._usage.clear()
+
+    def learned(self, limit=MAX_LEARNED_PRESETS):
+        with self._lock:
+            common = self._usage.most_common(limit)
+        return [json.loads(key) for key, uses in common if uses >= MIN_USES_TO_LEARN]
+
+    def presets(self, options, location_counts=None, today=None):
+        """Lista de presets `{"name", "filters"}` sin duplicados."""
+        today = today or date.today()
+        defaults = default_filters(options)
+        presets = [{"name": "Todo", "filters": defaults}]
+
+        if today.year in options["Year"]:
+            presets.append({"name": "Este año", "filters": dict(defaults, year=[today.year])})
+        start = max(pd.Timestamp(today) - pd.DateOffset(months=3), pd.Timestamp(options["Date"][0])).date()
+        presets.append({"name": "Últimos 3 meses",
+                        "filters": dict(defaults, date_range=[start.isoformat(), today.isoformat()])})
+
+        if location_counts is not None:
+            for place in location_counts.nlargest(TOP_LOCATION_PRESETS).index:
+                presets.append({"name": f"Lugar: {place}", "filters": dict(defaults, location=[place])})
+
+        for filters in self.learned():
+            presets.append({"name": f"Frecuente · {describe(filters, defaults)}", "filters": filters})
+
+        unique, seen = [], set()
+        for preset in presets:
+            key = json.dumps(preset["filters"], sort_keys=True, default=str)
+            if key not in seen:
+                seen.add(key)
+                unique.append(preset)
+        return unique
+
+
+preset_registry = PresetRegistry()
+
+_executor = ThreadPoolExecutor(max_workers=PREWARM_WORKERS, thread_name_prefix="prewarm")
+_warmed = set()
+_warmed_lock = threading.Lock()
+
+
+def clear_prewarmed():
+    """Olvida qué presets se han pre-calentado (se volverán a calentar en la siguiente ejecución)."""
+    with _warmed_lock:
+        _warmed.clear()
+
+
+def _warm(load_for, load_full, snapshot, filters):
+    get_view(snapshot, load_for, filters, load_full, owner=PREWARM_OWNER)
+
+
+def schedule_prewarm(snapshot, presets, load_for, load_full):
+    """
+    Pre-calienta en segundo plano los presets aún no calentados para este snapshot de datos.
+    `load_for(filters)` devuelve el DataFrame base para unos filtros y `load_full()` el historial completo.
+    """
+    if memory_manager.degraded():  # Sin margen de memoria no se pre-calienta nada
+        return []
+    pending = []
+    with _warmed_lock:
+        _warmed.difference_update({key for key in _warmed if key[0] != snapshot})  # Snapshots anteriores
+        for preset in presets:
+            key = (snapshot, json.dumps(preset["filters"], sort_keys=True, default=str))
+            if key not in _warmed:
+                _warmed.add(key)
+                pending.append(preset["filters"])
+    return [_executor.submit(_warm, load_for, load_full, snapshot, filters) for filters in pending]